@@ -0,0 +1,220 @@
+import threading
+
+import numpy as np
+
+from schema import cpu_usage_percent, disk_free_percent, parse_quantity, total_quantity
+
+PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+
+def _first(items, key):
+    return items[0].get(key) if isinstance(items, list) and items and isinstance(items[0], dict) else None
+
+
+def _antivirus(products):
+    # get_antivirus_details lists product names; ["Unknown"] when the query failed
+    if not isinstance(products, list) or not products or not isinstance(products[0], str):
+        return None
+    return None if products[0] == "Unknown" else products[0]
+
+
+# field -> (kind, collector it comes from, extractor over that collector's value)
+FIELDS = {
+    "ram_bytes": ("numeric", "memory", lambda value: total_quantity(value, "size")),
+    "disk_total_bytes": ("numeric", "storage", lambda value: total_quantity(value.values(), "total")),
+    "disk_free_bytes": ("numeric", "storage", lambda value: total_quantity(value.values(), "free")),
+    "disk_free_percent": ("numeric", "storage", disk_free_percent),
+    "cpu_cores": ("numeric", "cpu", lambda value: parse_quantity(_first(value, "cores"))),
+    "cpu_speed_hz": ("numeric", "cpu", lambda value: parse_quantity(_first(value, "speed"))),
+    "cpu_usage_percent": ("numeric", "cpu_usage", cpu_usage_percent),
+    "process_count": ("numeric", "running_processes", lambda value: float(len(value))),
+    "cpu_model": ("categorical", "cpu", lambda value: _first(value, "name")),
+    "motherboard": ("categorical", "motherboard", lambda value: value.get("product")),
+    "manufacturer": ("categorical", "motherboard", lambda value: value.get("manufacturer")),
+    "antivirus": ("categorical", "antivirus", _antivirus),
+}
+SOFTWARE_COLLECTOR = "installed_software"
+
+
+class Vocabulary:
+    """Dictionary encoding for a categorical column: value <-> int code."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+class FleetView:
+    """Columnar projection of every device's latest snapshot, for fleet-wide aggregates.
+
+    Each field is one NumPy array with a row per device (NaN or -1 where unknown), so
+    percentiles, histograms and group-bys run over whole columns at once. Installed software
+    is kept as flat (device, name, version) code arrays rebuilt lazily after changes.
+    """
+
+    def __init__(self, fields=FIELDS, capacity=1024):
+        self.fields = fields
+        self.rows = {}  # serial number -> row
+        self.lock = threading.Lock()
+        self.columns = {}
+        self.vocabularies = {}
+        for name, (kind, _, _) in fields.items():
+            if kind == "numeric":
+                self.columns[name] = np.full(capacity, np.nan)
+            else:
+                self.columns[name] = np.full(capacity, -1, dtype=np.int32)
+                self.vocabularies[name] = Vocabulary()
+        self.software_names = Vocabulary()
+        self.software_versions = Vocabulary()
+        self.software = {}  # row -> (name codes, version codes)
+        self.software_columns = None
+
+    def _row(self, serial_number):
+        row = self.rows.get(serial_number)
+        if row is None:
+            row = self.rows[serial_number] = len(self.rows)
+            capacity = len(next(iter(self.columns.values())))
+            if row >= capacity:
+                for name, column in self.columns.items():
+                    grown = np.full(capacity * 2, np.nan if column.dtype.kind == "f" else -1, dtype=column.dtype)
+                    grown[:capacity] = column
+                    self.columns[name] = grown
+        return row
+
+    def update(self, serial_number, data):
+        """Apply a device's new collector values; fields of collectors not in data keep their value."""
+        with self.lock:
+            row = self._row(serial_number)
+            for name, (kind, collector, extract) in self.fields.items():
+                if collector not in data:
+                    continue
+                try:
+                    value = extract(data[collector])
+                except (AttributeError, KeyError, TypeError, ValueError, ZeroDivisionError):
+                    value = None
+                if kind == "numeric":
+                    self.columns[name][row] = np.nan if value is None else value
+                else:
+                    self.columns[name][row] = self.vocabularies[name].code(value)
+
+            if isinstance(data.get(SOFTWARE_COLLECTOR), list):
+                items = [item for item in data[SOFTWARE_COLLECTOR] if isinstance(item, dict)]
+                self.software[row] = (
+                    np.array([self.software_names.code(item.get("DisplayName", item.get("name"))) for item in items], dtype=np.int32),
+                    np.array([self.software_versions.code(item.get("DisplayVersion", item.get("version"))) for item in items], dtype=np.int32),
+                )
+                self.software_columns = None
+
+    def load(self, rows):
+        """Bulk-load from (serial_number, collector, value) rows, e.g. ReportStore.iter_latest()."""
+        devices = {}
+        for serial_number, collector, value in rows:
+            devices.setdefault(serial_number, {})[collector] = value
+        for serial_number, data in devices.items():
+            self.update(serial_number, data)
+        return len(devices)
+
+    def _column(self, field, serial_numbers=None):
+        column = self.columns[field][:len(self.rows)]
+        if serial_numbers is not None:
+            column = column[[self.rows[serial] for serial in serial_numbers if serial in self.rows]]
+        return column
+
+    def summary(self, field, serial_numbers=None):
+        """count/mean/min/max and percentiles of a numeric field."""
+        with self.lock:
+            column = self._column(field, serial_numbers)
+            values = column[~np.isnan(column)]
+        if not len(values):
+            return {"count": 0}
+        percentiles = np.percentile(values, PERCENTILES)
+        return {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+        }
+
+    def histogram(self, field, bins=10, serial_numbers=None):
+        with self.lock:
+            column = self._column(field, serial_numbers)
+            values = column[~np.isnan(column)]
+        counts, edges = np.histogram(values, bins=bins)
+        return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+    def counts(self, field, top=None, serial_numbers=None):
+        """Devices per value of a categorical field, most common first."""
+        with self.lock:
+            codes = self._column(field, serial_numbers)
+            vocabulary = list(self.vocabularies[field].values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(vocabulary))
+        order = np.argsort(-counts, kind="stable")[:top]
+        return {vocabulary[code]: int(counts[code]) for code in order if counts[code]}
+
+    def group_by(self, by, field, serial_numbers=None):
+        """count/mean/min/max of a numeric field per value of a categorical field."""
+        with self.lock:
+            codes = self._column(by, serial_numbers)
+            values = self._column(field, serial_numbers)
+            vocabulary = list(self.vocabularies[by].values)
+        keep = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[keep], values[keep]
+        if not len(codes):
+            return {}
+
+        size = len(vocabulary)
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=values, minlength=size)
+        minimums = np.full(size, np.inf)
+        maximums = np.full(size, -np.inf)
+        np.minimum.at(minimums, codes, values)
+        np.maximum.at(maximums, codes, values)
+        return {
+            vocabulary[code]: {
+                "count": int(counts[code]),
+                "mean": float(sums[code] / counts[code]),
+                "min": float(minimums[code]),
+                "max": float(maximums[code]),
+            }
+            for code in np.flatnonzero(counts)
+        }
+
+    def _software_columns(self):
+        if self.software_columns is None:
+            rows = list(self.software)
+            self.software_columns = (
+                np.concatenate([np.full(len(self.software[row][0]), row, dtype=np.int32) for row in rows] or [np.empty(0, np.int32)]),
+                np.concatenate([self.software[row][0] for row in rows] or [np.empty(0, np.int32)]),
+                np.concatenate([self.software[row][1] for row in rows] or [np.empty(0, np.int32)]),
+            )
+        return self.software_columns
+
+    def software_spread(self, name):
+        """Devices per installed version of a piece of software."""
+        with self.lock:
+            code = self.software_names.codes.get(name)
+            if code is None:
+                return {}
+            devices, names, versions = self._software_columns()
+            vocabulary = list(self.software_versions.values)
+        mask = names == code
+        # A device with the same version listed twice (32- and 64-bit keys) counts once
+        pairs = np.unique(np.stack([devices[mask], versions[mask]]), axis=1)
+        found, counts = np.unique(pairs[1], return_counts=True)
+        return {
+            ("Unknown" if version < 0 else vocabulary[version]): int(count)
+            for version, count in sorted(zip(found, counts), key=lambda pair: -pair[1])
+        }
+
+
+default_view = FleetView()
@@ -1,39 +1,109 @@
 import time
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from datetime import datetime
-import json
-import os
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room
+from delta import SnapshotStore
+import aggregate
+import dispatch
+import ingest
+import metrics
+import schema
+import storage
+import timeseries
+import wire
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 devices = []
+device_sids = {}  # Socket.IO session id -> serial number sent on register
+snapshots = SnapshotStore()
+spool_cursors = {}  # serial number -> id of the last spooled report stored
+group_members = {}  # group name -> serial numbers assigned to it
+agent_telemetry = {}  # serial number -> the agent's latest metrics summary
+
+metrics.gauge("ingest_queue_depth", lambda: ingest.default_queue.queue.qsize())
+metrics.gauge("connected_devices", lambda: len(set(device_sids.values())))
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def observe_request(response):
+    if "started" in g:
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("http_request_seconds", time.perf_counter() - g.started,
+                        method=request.method, endpoint=rule, status=response.status_code)
+    return response
+
+def emit(event, data, to=None):
+    with metrics.timer("socketio_emit_seconds", event=event):
+        socketio.emit(event, data, to=to)
+
+def store_report(serial_number, data, wait=None):
+    """Queue a report for the background writer; with wait, return once it is committed."""
+    ingest.default_queue.submit(serial_number, data, wait)
+
+def receive_report(serial_number, report):
+    """Rebuild a full or delta report into the full snapshot and store it. Returns the ack for the agent."""
+    snapshot, ack = snapshots.receive(serial_number, report)
+    if snapshot is not None:
+        try:
+            store_report(serial_number, {
+                "schedule": report.get("schedule"),
+                "data": snapshot,
+                "timestamp": datetime.now().isoformat()
+            })
+        except ingest.IngestBusy:
+            # Not stored: have the agent start over with a full report
+            return {"status": "resync", "reason": "busy"}
+        aggregate.default_view.update(serial_number, snapshot)
+    return ack
+
+def request_payload():
+    """JSON body, or a frame when the agent negotiated the binary wire format."""
+    if request.content_type == wire.CONTENT_TYPE:
+        return wire.decode(request.get_data())
+    return request.json
 
 @app.route("/api/data", methods=["POST"])
 def device_report():
-    data = request.json
-    if not data or "data" not in data or "schedule" not in data:
+    try:
+        data = request_payload()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid frame: {e}"}), 400
+    if not isinstance(data, dict) or not data or not ("data" in data or data.get("type") == "delta") or "schedule" not in data:
         return jsonify({"error": "Invalid data format"}), 400
     
-    data["timestamp"] = datetime.now().isoformat()
-    hardware_info = data["data"].get("hardware", {})
-    serial_number = hardware_info.get("serial_number", "unknown")
-    
-    file_path = f"devices/{data['hardware']['serial_number']}.json"
-    
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            existing_data = json.load(f)
-    else:
-        existing_data = []
+    serial_number = data.get("serial_number") or data.get("data", {}).get("hardware", {}).get("serial_number", "unknown")
+    ack = receive_report(serial_number, data)
+    if ack.get("reason") == "busy":
+        return jsonify({"error": "Server busy, retry later"}), 503
+    if ack["status"] != "ok":
+        return jsonify({"message": "Full report required", **ack}), 409
+        
+    return jsonify({"message": "Device data received", "status": "success", "seq": ack["seq"]}), 200
 
-    existing_data.append(data)
+def connected_devices():
+    return set(device_sids.values())
 
-    with open(file_path, "w") as f:
-        json.dump(existing_data, f, indent=4)
-        
-    return jsonify({"message": "Device data received", "status": "success"}), 200
+def sids_for(serial_number):
+    return [sid for sid, serial in device_sids.items() if serial == serial_number]
+
+def resolve_targets(data):
+    """Rooms to emit to (None for every device) and the connected serial numbers they reach.
+
+    Requests can name "serial_numbers" and/or "groups"; with neither they go to the whole fleet.
+    """
+    serial_numbers = data.get("serial_numbers") or []
+    groups = data.get("groups") or []
+    if not serial_numbers and not groups:
+        return None, connected_devices()
+
+    rooms = [dispatch.device_room(serial) for serial in serial_numbers] + [dispatch.group_room(group) for group in groups]
+    targeted = set(serial_numbers).union(*(group_members.get(group, ()) for group in groups))
+    return rooms, targeted & connected_devices()
 
 @app.route("/api/schedule", methods=["POST"])
 def send_schedule():
@@ -41,21 +111,272 @@ def send_schedule():
     schedule_id = data.get("schedule_id")
     interval = data.get("interval")
     details_required = data.get("details_required")
-    socketio.emit("create_schedule", {"schedule_id": schedule_id, "interval": interval, "details_required": details_required})
+    rooms, targeted = resolve_targets(data)
+    emit("create_schedule", {"schedule_id": schedule_id, "interval": interval, "details_required": details_required}, to=rooms)
 
-    return jsonify({"message": "Schedule sent", "status": "success"}), 200
+    return jsonify({"message": "Schedule sent", "status": "success", "devices": len(targeted)}), 200
 
 @app.route("/api/custom", methods=["POST"])
 def get_custom_data():
+    """Ask the targeted devices for details and gather their answers.
+
+    Waits up to "timeout" seconds for every targeted device to answer. With "wait": false it
+    returns the request id straight away; poll /api/custom/<request_id> for the answers.
+    """
     data = request.json
-    socketio.emit("custom_data", {"details_required": data['details_required']})
+    rooms, targeted = resolve_targets(data)
+    gather = dispatch.default_dispatcher.start(targeted)
+    emit("custom_data", {
+        "details_required": data['details_required'],
+        "refresh": data.get("refresh", False),
+        "request_id": gather.request_id
+    }, to=rooms)
+
+    if not data.get("wait", True):
+        return jsonify({"data": data, "request_id": gather.request_id, "expected": sorted(targeted)}), 202
+
+    deadline = min(float(data.get("timeout", dispatch.DEFAULT_DEADLINE)), dispatch.MAX_DEADLINE)
+    return jsonify({"data": data, **gather.wait(deadline)}), 200
+
+@app.route("/api/custom/<request_id>", methods=["GET"])
+def get_custom_results(request_id):
+    gather = dispatch.default_dispatcher.get(request_id)
+    if gather is None:
+        return jsonify({"error": "Unknown or expired request"}), 404
+    return jsonify(gather.snapshot()), 200
+
+@app.route("/api/groups/<group>", methods=["POST"])
+def add_to_group(group):
+    """Assign devices to a group; connected ones join its room right away."""
+    serial_numbers = request.json.get("serial_numbers", [])
+    group_members.setdefault(group, set()).update(serial_numbers)
+    for serial_number in serial_numbers:
+        for sid in sids_for(serial_number):
+            join_room(dispatch.group_room(group), sid=sid, namespace="/")
 
-    return jsonify({"data": data}), 200
+    return jsonify({"group": group, "serial_numbers": sorted(group_members[group])}), 200
+
+@socketio.on("register")
+@metrics.timed("socketio_event_seconds", event="register")
+def register_device(data):
+    serial_number = data.get("serial_number", request.sid)
+    device_sids[request.sid] = serial_number
+    join_room(dispatch.device_room(serial_number))
+    # Groups the agent reports for itself, plus any the admin assigned it to
+    for group in data.get("groups", []):
+        group_members.setdefault(group, set()).add(serial_number)
+    for group, members in group_members.items():
+        if serial_number in members:
+            join_room(dispatch.group_room(group))
+
+    # Agents that offer capabilities get the best wire format and data schema both sides support
+    return {
+        "status": "ok",
+        "format": wire.negotiate(data["capabilities"]) if "capabilities" in data else None,
+        "schema": schema.negotiate(data.get("schemas", [schema.LEGACY]))
+    }
+
+@socketio.on("disconnect")
+def unregister_device():
+    device_sids.pop(request.sid, None)
 
 @socketio.on("processed_data")
+@metrics.timed("socketio_event_seconds", event="processed_data")
 def receive_processed_data(data):
     """Handles processed data from the client"""
+    try:
+        data = wire.unpack(data)
+    except ValueError as e:
+        print(f"Malformed processed data from {request.sid}: {e}")
+        return {"status": "error", "reason": "malformed"}
+    serial_number = device_sids.get(request.sid, request.sid)
+    if "telemetry" in data:
+        agent_telemetry[serial_number] = {"received": datetime.now().isoformat(), "metrics": data["telemetry"]}
+
+    # The return value is sent back to the agent as the acknowledgement
+    if "request_id" in data:
+        known = dispatch.default_dispatcher.receive(data["request_id"], serial_number, data.get("data"))
+        return {"status": "ok" if known else "expired"}
+    if "reports" in data:
+        return {"acks": [receive_report(serial_number, report) for report in data["reports"]]}
+    if "schedule" in data:
+        return receive_report(serial_number, data)
+
     print(f"Received processed data: {data}")
 
+@socketio.on("spooled_data")
+@metrics.timed("socketio_event_seconds", event="spooled_data")
+def receive_spooled_data(data):
+    """Reports an agent stored while offline, oldest first. Acknowledges the last id stored."""
+    try:
+        data = wire.unpack(data)
+    except ValueError as e:
+        print(f"Malformed spooled data from {request.sid}: {e}")
+        return {"status": "error", "reason": "malformed"}
+    serial_number = device_sids.get(request.sid, request.sid)
+    last_id = spool_cursors.get(serial_number, 0)
+
+    pending = []
+    for report in data.get("reports", []):
+        # Skip reports already stored when an earlier acknowledgement got lost
+        if report["id"] <= last_id:
+            continue
+        try:
+            pending.append(ingest.default_queue.submit(serial_number, {
+                "schedule": report.get("schedule"),
+                "data": report["data"],
+                "timestamp": datetime.fromtimestamp(report["time"]).isoformat(),
+                "spooled": True
+            }, wait=False))
+        except ingest.IngestBusy:
+            break
+        last_id = report["id"]
+
+    # The agent deletes what we acknowledge, so wait until it is committed whatever the durability setting
+    for future in pending:
+        future.result(ingest.COMMIT_TIMEOUT)
+
+    spool_cursors[serial_number] = last_id
+    return {"status": "ok", "last_id": last_id}
+
+@app.route("/api/resync", methods=["POST"])
+def request_resync():
+    """Ask a device to send its next report for a schedule (or all schedules) in full."""
+    data = request.json
+    sids = sids_for(data.get("serial_number"))
+    emit("request_resync", {"schedule_id": data.get("schedule_id")}, to=dispatch.device_room(data.get("serial_number")))
+
+    return jsonify({"message": "Resync requested", "status": "success", "sessions": len(sids)}), 200
+
+@app.route("/api/ingest/stats", methods=["GET"])
+def ingest_stats():
+    return jsonify(ingest.default_queue.stats()), 200
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Server metrics in the Prometheus text format; 404 when metrics are turned off."""
+    if not metrics.ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+def time_arg(name):
+    """Optional query-string time as epoch seconds; accepts epoch numbers and ISO timestamps."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return storage.epoch_seconds(value)
+
+@app.route("/api/devices", methods=["GET"])
+def list_devices():
+    return jsonify({"devices": storage.default_store.devices()}), 200
+
+@app.route("/api/devices/<serial_number>/latest", methods=["GET"])
+def device_latest(serial_number):
+    """Current value of each collector, or of the collectors given as ?collector=...&collector=...
+
+    Values are stored as the agent sent them; ?display=1 formats raw quantities for people to read.
+    """
+    latest = storage.default_store.latest(serial_number, request.args.getlist("collector"))
+    if not latest:
+        return jsonify({"error": "Unknown device or collector"}), 404
+    if request.args.get("display"):
+        rendered = schema.render({collector: entry["value"] for collector, entry in latest.items()}, schema.LEGACY)
+        for collector, entry in latest.items():
+            entry["value"] = rendered[collector]
+    return jsonify({"serial_number": serial_number, "latest": latest}), 200
+
+@app.route("/api/devices/<serial_number>/telemetry", methods=["GET"])
+def device_telemetry(serial_number):
+    """The agent's own metrics (collector timings, PowerShell time, payload sizes) from its last report."""
+    telemetry = agent_telemetry.get(serial_number)
+    if telemetry is None:
+        return jsonify({"error": "No telemetry from this device"}), 404
+    return jsonify({"serial_number": serial_number, **telemetry}), 200
+
+@app.route("/api/devices/<serial_number>/history", methods=["GET"])
+def device_history(serial_number):
+    """Reports between ?since= and ?until=, optionally only ?collector=... and at most ?limit= of them."""
+    try:
+        since, until = time_arg("since"), time_arg("until")
+        limit = request.args.get("limit", type=int)
+    except ValueError:
+        return jsonify({"error": "Invalid time range"}), 400
+
+    history = storage.default_store.history(serial_number, since, until, limit, request.args.getlist("collector"))
+    return jsonify({"serial_number": serial_number, "history": history}), 200
+
+@app.route("/api/devices/<serial_number>/series/<metric>", methods=["GET"])
+def device_series(serial_number, metric):
+    """A volatile metric between ?since= and ?until= (default: the last day).
+
+    Short recent ranges come from raw samples, longer ones from 5-minute, hourly or daily
+    rollups; ?resolution= (seconds, 0 for raw) picks one explicitly.
+    """
+    if metric not in timeseries.METRICS:
+        return jsonify({"error": "Unknown metric"}), 404
+    try:
+        until = time_arg("until") or time.time()
+        since = time_arg("since") or until - 24 * 3600
+        resolution = request.args.get("resolution", type=int)
+    except ValueError:
+        return jsonify({"error": "Invalid time range"}), 400
+    if resolution is not None and resolution not in timeseries.RETENTION:
+        return jsonify({"error": f"Resolution must be one of {sorted(timeseries.RETENTION)}"}), 400
+
+    resolution, points = timeseries.default_store.series(serial_number, metric, since, until, resolution)
+    return jsonify({"serial_number": serial_number, "metric": metric, "resolution": resolution, "points": points}), 200
+
+@app.route("/api/fleet/fields", methods=["GET"])
+def fleet_fields():
+    return jsonify({name: kind for name, (kind, _, _) in aggregate.FIELDS.items()}), 200
+
+@app.route("/api/fleet/<field>", methods=["GET"])
+def fleet_aggregate(field):
+    """Fleet-wide aggregate of a field, optionally for one ?group=.
+
+    Numeric fields: summary with percentiles, a histogram with ?bins=, or per-category stats with ?by=.
+    Categorical fields: devices per value, the ?top= most common.
+    """
+    if field not in aggregate.FIELDS:
+        return jsonify({"error": "Unknown field"}), 404
+    group = request.args.get("group")
+    serial_numbers = group_members.get(group, set()) if group else None
+    view = aggregate.default_view
+
+    if aggregate.FIELDS[field][0] == "categorical":
+        return jsonify({"field": field, "counts": view.counts(field, request.args.get("top", type=int), serial_numbers)}), 200
+    if "by" in request.args:
+        by = request.args["by"]
+        if aggregate.FIELDS.get(by, ("",))[0] != "categorical":
+            return jsonify({"error": "Can only group by a categorical field"}), 400
+        return jsonify({"field": field, "by": by, "groups": view.group_by(by, field, serial_numbers)}), 200
+    if "bins" in request.args:
+        return jsonify({"field": field, "histogram": view.histogram(field, request.args.get("bins", type=int), serial_numbers)}), 200
+    return jsonify({"field": field, **view.summary(field, serial_numbers)}), 200
+
+@app.route("/api/fleet/software/<path:name>", methods=["GET"])
+def fleet_software(name):
+    """Devices per installed version of one piece of software."""
+    return jsonify({"name": name, "versions": aggregate.default_view.software_spread(name)}), 200
+
+def compact_storage():
+    while True:
+        socketio.sleep(storage.COMPACT_INTERVAL)
+        try:
+            storage.default_store.compact()
+            timeseries.default_store.compact()
+        except Exception as e:
+            print(f"Storage compaction failed: {e}")
+
+def serve(host="0.0.0.0", port=5000, debug=False):
+    storage.default_store.import_legacy()
+    aggregate.default_view.load(storage.default_store.iter_latest())
+    ingest.default_queue.start()
+    socketio.start_background_task(compact_storage)
+    socketio.run(app, host=host, port=port, debug=debug, use_reloader=False, allow_unsafe_werkzeug=True)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    serve(debug=True)
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""Fleet aggregation benchmark: load N synthetic devices into the columnar view and time queries.
+
+    python benchmarks/aggregate.py [--devices 50000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregate  # noqa: E402
+from benchmarks.payloads import software  # noqa: E402
+
+CPU_MODELS = [f"Intel(R) Core(TM) i{tier}-{generation}00 @ 3.00GHz" for tier in (3, 5, 7, 9) for generation in range(8, 15)]
+
+
+def device(rng, catalogue):
+    return {
+        "memory": [{"size": f"{rng.choice([4, 8, 16, 32]):.2f} GB", "manufacturer": "Samsung", "speed": "3200 MHz"}] * rng.choice([1, 2]),
+        "storage": {"C:\\": {"total": "475.84 GB", "free": f"{rng.uniform(5, 470):.2f} GB"}},
+        "cpu": [{"name": rng.choice(CPU_MODELS), "cores": rng.choice([2, 4, 6, 8]), "speed": "3000 MHz", "usage": "12.5%"}],
+        "cpu_usage": {"cpu_usage_avg": rng.uniform(0, 100)},
+        "motherboard": {"manufacturer": rng.choice(["Dell Inc.", "LENOVO", "HP"]), "product": f"0X{rng.randint(0, 99):02d}"},
+        "installed_software": rng.sample(catalogue, 80),
+    }
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    catalogue = software(400, rng)
+    view = aggregate.FleetView()
+    load_ms = timed(lambda: [view.update(f"SN{i:08d}", device(rng, catalogue)) for i in range(args.devices)])
+
+    name = catalogue[0]["DisplayName"]
+    result = {
+        "devices": args.devices,
+        "load_ms": load_ms,
+        "query_ms": {
+            "ram_summary": timed(view.summary, "ram_bytes"),
+            "disk_free_percentiles": timed(view.summary, "disk_free_percent"),
+            "disk_free_histogram": timed(view.histogram, "disk_free_percent", 20),
+            "cpu_model_counts": timed(view.counts, "cpu_model"),
+            "ram_by_cpu_model": timed(view.group_by, "cpu_model", "ram_bytes"),
+            # First call rebuilds the flat software arrays; the second is the steady-state cost
+            "software_spread_cold": timed(view.software_spread, name),
+            "software_spread": timed(view.software_spread, name),
+        },
+    }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    main()
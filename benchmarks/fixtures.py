@@ -0,0 +1,317 @@
+"""Canned PowerShell, registry and psutil outputs for small, typical and huge machines.
+
+install() swaps them in for the real sources so the collectors run, and can be timed, on any
+platform. Outputs are synthetic by default; outputs recorded on a real machine with
+
+    python benchmarks/fixtures.py record DIR
+
+(on Windows) can be used instead by passing that directory to install().
+"""
+import collections
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import powershell  # noqa: E402
+from benchmarks.payloads import CLASSES, SIZES, VENDORS  # noqa: E402
+
+SEED = 0
+
+
+def _json(value):
+    # ConvertTo-Json indents with four spaces and unwraps one-item arrays
+    return json.dumps(value[0] if isinstance(value, list) and len(value) == 1 else value, indent=4)
+
+
+def _lines(values):
+    # STREAMED queries print each object with ConvertTo-Json -Compress, one per line
+    return "\n".join(json.dumps(value, separators=(",", ":")) for value in values)
+
+
+def powershell_outputs(size, seed=SEED):
+    """Query name -> output text, in the shape each POWERSHELL_QUERIES entry prints."""
+    rng = random.Random(seed)
+    counts = SIZES[size]
+    return {
+        "memory": "\n".join(f"{rng.choice([8, 16, 32]) * 1024**3},Samsung,3200" for _ in range(rng.choice([1, 2, 4]))),
+        "serial_number": f"SN{seed:08d}",
+        "motherboard": "Dell Inc.,0X8DXD",
+        "monitor": _json([{"Name": "Generic PnP Monitor", "ScreenWidth": 1920, "ScreenHeight": 1080}]),
+        "cpu": _json([{"Name": "Intel(R) Core(TM) i7-1185G7 @ 3.00GHz  ", "NumberOfCores": 4, "MaxClockSpeed": 3000}]),
+        "gpu": _json([{"Name": "Intel(R) Iris(R) Xe Graphics", "AdapterRAM": 1073741824}]),
+        "total_memory": _json({"TotalVisibleMemorySize": 16 * 1024**2}),
+        "peripheral_devices": _lines([
+            {"Name": f"{rng.choice(CLASSES).title()} Device {i}", "DeviceID": f"USB\\VID_{rng.randint(0, 0xFFFF):04X}\\{i}"}
+            for i in range(counts["devices"])
+        ]),
+        "pnp_count": str(counts["devices"]),
+        "windows_update_status": _json({"InstalledOn": {"value": "/Date(1700000000000)/", "DateTime": "Tuesday, November 14, 2023 12:00:00 AM"}}),
+        "installed_drivers": _lines([
+            {
+                "DeviceName": f"{rng.choice(CLASSES).title()} Device {i}",
+                "DriverVersion": f"10.0.{rng.randint(10000, 26000)}.{rng.randint(1, 5000)}",
+                "Manufacturer": rng.choice(VENDORS),
+                "DriverDate": f"/Date({rng.randint(1_300_000_000, 1_700_000_000)}000)/",
+                "DeviceClass": rng.choice(CLASSES),
+                "DriverProviderName": rng.choice(VENDORS),
+                "InfName": f"oem{rng.randint(0, 300)}.inf",
+                "HardwareID": [f"PCI\\VEN_{rng.randint(0, 0xFFFF):04X}&DEV_{rng.randint(0, 0xFFFF):04X}"],
+                "IsSigned": True,
+                "DigitalSigner": "Microsoft Windows Hardware Compatibility Publisher",
+                "OEMINF": None,
+            }
+            for i in range(counts["drivers"])
+        ]),
+        "network_adapters": _lines([
+            {"Name": f"Adapter {i}", "MACAddress": f"00:1A:2B:3C:{i // 256:02X}:{i % 256:02X}",
+             "NetConnectionStatus": rng.choice([2, 7, None]), "AdapterType": "Ethernet 802.3", "Speed": 1_000_000_000}
+            for i in range(max(4, counts["devices"] // 20))
+        ]),
+        "vpn_status": "",
+        "antivirus": _json([{"displayName": "Windows Defender"}]),
+        "firewall": _json([{"Name": name, "Enabled": True} for name in ("Domain", "Private", "Public")]),
+        # Event log sources (see eventlog.py): the log's newest RecordId, then the matching events
+        "login_history": _lines([{"newest": 5000}] + [
+            {"record_id": 4000 + i * 10, "event_id": 4624, "time": f"2023-11-14T{i % 24:02d}:00:00.0000000Z",
+             "user": "alex", "domain": "CORP", "logon_type": rng.choice([2, 3, 5, 7, 10])}
+            for i in range(10)
+        ]),
+        "security_events": _lines([{"newest": 5000}] + [
+            {"record_id": 4005 + i * 50, "event_id": rng.choice([4625, 4740]), "time": f"2023-11-14T{i:02d}:30:00.0000000Z"}
+            for i in range(2)
+        ]),
+        "bitlocker_status": _json([{"MountPoint": "C:", "ProtectionStatus": 1}]),
+        "windows_product_key": "XXXXX-XXXXX-XXXXX-XXXXX-XXXXX",
+    }
+
+
+def load_recorded(directory):
+    with open(os.path.join(directory, "powershell.json"), "r") as f:
+        return json.load(f)
+
+
+def canned_runner(outputs):
+    """A powershell command runner that answers from outputs instead of spawning PowerShell."""
+    from collectors.queries import POWERSHELL_QUERIES
+    from eventlog import SOURCES
+
+    by_command = {command.strip(): name for name, command in POWERSHELL_QUERIES.items()}
+    # Event log queries are told apart by their log and event id filter, as eventlog.build_query writes them
+    by_filter = {
+        source: (f"-LogName '{log}'", "*[System[(" + " or ".join(f"EventID={event_id}" for event_id in event_ids) + ")")
+        for source, (log, event_ids, _) in SOURCES.items()
+    }
+
+    def runner(args, check=True, timeout=None):
+        script = args[-1]
+        for source, (log, xpath) in by_filter.items():
+            if log in script and xpath in script:
+                return outputs.get(source, "")
+        if "$results = @{}" in script:
+            names = [name for name in POWERSHELL_QUERIES if f"$results['{name}']" in script]
+            return json.dumps({name: outputs[name] for name in names if name in outputs})
+        return outputs.get(by_command.get(script.strip()), "")
+
+    return runner
+
+
+class FakeWinreg:
+    """The part of winreg that get_installed_software uses, over an in-memory Uninstall key."""
+
+    HKEY_LOCAL_MACHINE = "HKLM"
+    HKEY_CURRENT_USER = "HKCU"
+
+    def __init__(self, size, seed=SEED):
+        rng = random.Random(seed)
+        count = SIZES[size]["software"]
+        entries = [
+            {
+                "DisplayName": f"Application {i}",
+                "DisplayVersion": f"{rng.randint(1, 30)}.{rng.randint(0, 99)}.{rng.randint(0, 9999)}",
+                "Publisher": rng.choice(VENDORS),
+                "InstallDate": f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+                "UninstallString": f"MsiExec.exe /X{{{rng.getrandbits(128):032X}}}",
+            }
+            for i in range(count)
+        ]
+        # Most software sits under the 64-bit HKLM key, some under WOW6432Node and HKCU
+        self.keys = {
+            ("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"): entries[: count * 6 // 10],
+            ("HKLM", r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"): entries[count * 6 // 10: count * 9 // 10],
+            ("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"): entries[count * 9 // 10:],
+        }
+
+    class Key:
+        def __init__(self, subkeys=None, values=None, modified=0):
+            self.subkeys = subkeys or []
+            self.values = values or {}
+            self.modified = modified  # last-write time, as QueryInfoKey reports it
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def OpenKey(self, parent, name):
+        if isinstance(parent, self.Key):
+            return parent.subkeys[int(name)]
+        entries = self.keys.get((parent, name))
+        if entries is None:
+            raise FileNotFoundError(name)
+        return self.Key(subkeys=[self.Key(values=entry) for entry in entries])
+
+    def QueryInfoKey(self, key):
+        return len(key.subkeys), len(key.values), key.modified
+
+    def EnumKey(self, key, index):
+        return str(index)
+
+    def EnumValue(self, key, index):
+        name = list(key.values)[index]
+        return name, key.values[name], 1
+
+
+class FakePsutil:
+    """A psutil stand-in with a fixed machine; only the calls the agent makes."""
+
+    POWER_TIME_UNLIMITED = -2
+    POWER_TIME_UNKNOWN = -1
+
+    class NoSuchProcess(Exception):
+        pass
+
+    class AccessDenied(Exception):
+        pass
+
+    class ZombieProcess(Exception):
+        pass
+
+    _cpu_times = collections.namedtuple("scputimes", "user system idle")
+    _usage = collections.namedtuple("sdiskusage", "total used free percent")
+    _partition = collections.namedtuple("sdiskpart", "device mountpoint fstype opts")
+    _memory = collections.namedtuple("svmem", "total available percent used free")
+    _battery = collections.namedtuple("sbattery", "percent secsleft power_plugged")
+    _user = collections.namedtuple("suser", "name terminal host started pid")
+    _memory_info = collections.namedtuple("pmem", "rss vms")
+    _address = collections.namedtuple("snicaddr", "family address netmask broadcast ptp")
+    _if_stats = collections.namedtuple("snicstats", "isup duplex speed mtu flags")
+
+    def __init__(self, size, seed=SEED):
+        rng = random.Random(seed)
+        self.ticks = 0
+        self.partitions = [self._partition(f"{letter}:\\", f"{letter}:\\", "NTFS", "rw") for letter in "CD"]
+        self.interfaces = {
+            "Ethernet": [self._address(-1, "00-1A-2B-3C-00-00", None, None, None), self._address(2, "10.0.0.15", "255.255.255.0", None, None)],
+            "Wi-Fi": [self._address(-1, "00-1A-2B-3C-00-01", None, None, None)],
+        }
+        names = ["svchost.exe", "chrome.exe", "explorer.exe", "RuntimeBroker.exe", "conhost.exe", "Teams.exe"]
+        self.process_table = {
+            4 + i * 4: (rng.choice(names), rng.randint(1, 800) * 1024**2)
+            for i in range(SIZES[size]["processes"])
+        }
+        fake = self
+
+        class Process:
+            def __init__(self, pid):
+                if pid not in fake.process_table:
+                    raise fake.NoSuchProcess(pid)
+                self.pid = pid
+                self.calls = 0
+
+            def oneshot(self):
+                return contextlib.nullcontext()
+
+            def is_running(self):
+                return self.pid in fake.process_table
+
+            def name(self):
+                return fake.process_table[self.pid][0]
+
+            def exe(self):
+                return f"C:\\Windows\\System32\\{self.name()}"
+
+            def username(self):
+                return "NT AUTHORITY\\SYSTEM"
+
+            def status(self):
+                return "running"
+
+            def cpu_percent(self, interval=None):
+                self.calls += 1
+                return float(self.pid % 7 * self.calls % 5)
+
+            def memory_info(self):
+                rss = fake.process_table[self.pid][1]
+                return fake._memory_info(rss, rss * 2)
+
+        self.Process = Process
+
+    def cpu_times(self):
+        self.ticks += 1
+        return self._cpu_times(self.ticks * 2.0, self.ticks * 1.0, self.ticks * 7.0)
+
+    def cpu_percent(self, interval=None):
+        return 30.0
+
+    def disk_partitions(self):
+        return list(self.partitions)
+
+    def disk_usage(self, path):
+        return self._usage(512 * 1024**3, 300 * 1024**3, 212 * 1024**3, 58.6)
+
+    def virtual_memory(self):
+        return self._memory(16 * 1024**3, 9 * 1024**3, 43.8, 7 * 1024**3, 9 * 1024**3)
+
+    def boot_time(self):
+        return 1_700_000_000.0
+
+    def sensors_battery(self):
+        return self._battery(80, self.POWER_TIME_UNLIMITED, True)
+
+    def users(self):
+        return [self._user("alex", "console", None, 1_700_000_000.0, None)]
+
+    def pids(self):
+        return list(self.process_table)
+
+    def net_if_addrs(self):
+        return {name: list(addresses) for name, addresses in self.interfaces.items()}
+
+    def net_if_stats(self):
+        return {name: self._if_stats(len(addresses) > 1, 2, 1000, 1500, "") for name, addresses in self.interfaces.items()}
+
+
+def install(size="typical", recorded=None):
+    """Serve every collector source from fixtures. Call before the collectors are imported."""
+    sys.modules["psutil"] = FakePsutil(size)
+    powershell.set_command_runner(canned_runner(load_recorded(recorded) if recorded else powershell_outputs(size)))
+
+    import collectors.software
+    collectors.software.winreg = FakeWinreg(size)
+
+    # Keep event log bookmarks away from the real agent's
+    import eventlog
+    eventlog.default_reader = eventlog.EventLogReader(os.path.join(tempfile.mkdtemp(), "eventlog_bookmarks.json"))
+
+
+def record(directory):
+    """Save this machine's real PowerShell outputs (run on Windows) for install(recorded=directory)."""
+    from collectors.queries import POWERSHELL_QUERIES
+
+    os.makedirs(directory, exist_ok=True)
+    outputs = powershell.run_batch(POWERSHELL_QUERIES)
+    with open(os.path.join(directory, "powershell.json"), "w") as f:
+        json.dump(outputs, f, indent=4)
+    print(f"Recorded {len(outputs)} query outputs to {directory}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "record":
+        sys.exit(__doc__)
+    record(sys.argv[2])
@@ -0,0 +1,261 @@
+"""Simulated-fleet load test for the backend.
+
+Starts backend.py locally (or uses --url), then for each fleet size connects that many simulated
+agents over Socket.IO, has them post synthetic reports to /api/data, and times schedule fan-out
+and custom-data scatter-gather. Reports ingest throughput, fan-out latency and server memory:
+
+    python benchmarks/fleet.py [--agents 100 500 1000] [--workers 4] [--duration 30]
+
+Needs the backend's dependencies plus python-socketio's asyncio client (aiohttp).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import schema  # noqa: E402
+import wire  # noqa: E402
+from benchmarks.payloads import report  # noqa: E402
+
+PORT = 5055
+REPORT_INTERVAL = 5  # seconds between reports from one agent
+FANOUT_TIMEOUT = 30  # seconds to wait for every agent to see a broadcast
+SERVER_SNIPPET = "import backend; backend.serve(host='127.0.0.1', port=%d)"
+
+
+class Agent:
+    """One simulated agent: registers like the real one, answers custom_data and posts reports."""
+
+    def __init__(self, url, serial_number, payload, stats):
+        self.url = url
+        self.serial_number = serial_number
+        self.payload = payload
+        self.stats = stats
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on("create_schedule", self.on_schedule)
+        self.sio.on("custom_data", self.on_custom_data)
+
+    async def connect(self):
+        await self.sio.connect(self.url, transports=["websocket"])
+        await self.sio.call("register", {
+            "serial_number": self.serial_number,
+            "capabilities": wire.capabilities(),
+            "schemas": list(schema.SUPPORTED)
+        })
+
+    async def on_schedule(self, data):
+        self.stats["schedule_received"].append(time.time())
+
+    async def on_custom_data(self, data):
+        answer = {detail: self.payload.get(detail) for detail in data.get("details_required", [])}
+        await self.sio.emit("processed_data", {"request_id": data.get("request_id"), "data": answer})
+
+    async def post_reports(self, session, until, interval):
+        # Spread the first reports out so agents don't all post in lockstep
+        await asyncio.sleep(random.uniform(0, interval))
+        body = {"schedule": "load", "serial_number": self.serial_number, "data": self.payload}
+        while time.monotonic() < until:
+            started = time.monotonic()
+            try:
+                async with session.post(f"{self.url}/api/data", json=body) as response:
+                    await response.read()
+                    self.stats["status"][response.status] = self.stats["status"].get(response.status, 0) + 1
+                self.stats["latency"].append(time.monotonic() - started)
+            except aiohttp.ClientError:
+                self.stats["status"]["error"] = self.stats["status"].get("error", 0) + 1
+            await asyncio.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+async def run_agents(url, first, count, size, duration, interval, barrier, results):
+    """Drive count agents through the phases, meeting the coordinator at the barrier between them."""
+    stats = {"latency": [], "status": {}, "schedule_received": []}
+    payload = report(size)
+    agents = [Agent(url, f"SIM{first + i:08d}", payload, stats) for i in range(count)]
+
+    started = time.monotonic()
+    outcomes = await asyncio.gather(*(agent.connect() for agent in agents), return_exceptions=True)
+    connect_seconds = time.monotonic() - started
+    connected = [agent for agent, outcome in zip(agents, outcomes) if outcome is None]
+    await asyncio.to_thread(barrier.wait)
+
+    # Ingest phase
+    connector = aiohttp.TCPConnector(limit=200)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        until = time.monotonic() + duration
+        await asyncio.gather(*(agent.post_reports(session, until, interval) for agent in connected))
+    await asyncio.to_thread(barrier.wait)
+
+    # Fan-out and scatter-gather phase: the coordinator triggers them, agents just answer
+    await asyncio.to_thread(barrier.wait)
+
+    await asyncio.gather(*(agent.sio.disconnect() for agent in connected), return_exceptions=True)
+    results.put({
+        "connected": len(connected),
+        "connect_seconds": connect_seconds,
+        "latency": stats["latency"],
+        "status": stats["status"],
+        "schedule_received": stats["schedule_received"],
+    })
+
+
+def worker(url, first, count, size, duration, interval, barrier, results):
+    asyncio.run(run_agents(url, first, count, size, duration, interval, barrier, results))
+
+
+def server_rss(pid):
+    """Resident memory of the server process in MB, from /proc (Linux) or psutil."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process(pid).memory_info().rss / 1024**2, 1)
+    except Exception:
+        return None
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def get(url, path, timeout):
+    import urllib.request
+    with urllib.request.urlopen(f"{url}{path}", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def post(url, path, body, timeout):
+    import urllib.request
+    request = urllib.request.Request(f"{url}{path}", json.dumps(body).encode(), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_fleet(url, agents, workers, size, duration, interval, server_pid):
+    workers = max(1, min(workers, agents))
+    barrier = multiprocessing.Barrier(workers + 1)
+    results = multiprocessing.Queue()
+    share = [agents // workers + (1 if i < agents % workers else 0) for i in range(workers)]
+    processes = [
+        multiprocessing.Process(target=worker, args=(url, sum(share[:i]), share[i], size, duration, interval, barrier, results))
+        for i in range(workers)
+    ]
+    memory = {"idle_mb": server_rss(server_pid)}
+    for process in processes:
+        process.start()
+
+    barrier.wait()  # everyone connected
+    memory["connected_mb"] = server_rss(server_pid)
+    barrier.wait()  # ingest done
+    memory["after_ingest_mb"] = server_rss(server_pid)
+
+    sent = time.time()
+    post(url, "/api/schedule", {"schedule_id": "load", "interval": 3600, "details_required": ["cpu_usage"]}, FANOUT_TIMEOUT)
+    time.sleep(min(FANOUT_TIMEOUT, 2 + agents / 500))
+    started = time.monotonic()
+    gathered = post(url, "/api/custom", {"details_required": ["cpu_usage", "storage"], "timeout": FANOUT_TIMEOUT}, FANOUT_TIMEOUT + 10)
+    gather_seconds = time.monotonic() - started
+    barrier.wait()  # fan-out done
+
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latency = [value for outcome in outcomes for value in outcome["latency"]]
+    fanout = [received - sent for outcome in outcomes for received in outcome["schedule_received"]]
+    status = {}
+    for outcome in outcomes:
+        for code, count in outcome["status"].items():
+            status[str(code)] = status.get(str(code), 0) + count
+
+    return {
+        "agents": agents,
+        "connected": sum(outcome["connected"] for outcome in outcomes),
+        "connect_seconds": round(max(outcome["connect_seconds"] for outcome in outcomes), 2),
+        "ingest": {
+            "reports": len(latency),
+            "reports_per_second": round(len(latency) / duration, 1),
+            "status": status,
+            "latency_ms_p50": round(percentile(latency, 50) * 1000, 1) if latency else None,
+            "latency_ms_p99": round(percentile(latency, 99) * 1000, 1) if latency else None,
+        },
+        "fanout": {
+            "received": len(fanout),
+            "latency_ms_p50": round(percentile(fanout, 50) * 1000, 1) if fanout else None,
+            "latency_ms_max": round(max(fanout) * 1000, 1) if fanout else None,
+        },
+        "gather": {
+            "answers": len(gathered.get("results", {})),
+            "missing": len(gathered.get("missing", [])),
+            "seconds": round(gather_seconds, 2),
+        },
+        "server_memory": memory,
+    }
+
+
+def start_server(port, directory):
+    """backend.py in its own process, with its data directory under directory."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    server = subprocess.Popen([sys.executable, "-c", SERVER_SNIPPET % port], cwd=directory, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            get(url, "/api/ingest/stats", 1)
+            return server, url
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Backend did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, nargs="*", default=[100, 500, 1000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes the agents are spread over")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of report posting per fleet size")
+    parser.add_argument("--interval", type=float, default=REPORT_INTERVAL, help="seconds between one agent's reports")
+    parser.add_argument("--size", default="small", choices=["small", "typical", "huge"], help="report payload size")
+    parser.add_argument("--url", help="use a backend that is already running instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid of that backend, for memory readings")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    results = []
+    for agents in args.agents:
+        # A fresh server per fleet size, so memory and storage readings don't carry over
+        with tempfile.TemporaryDirectory() as directory:
+            server, url = (None, args.url) if args.url else start_server(args.port, directory)
+            try:
+                results.append(run_fleet(url, agents, args.workers, args.size, args.duration, args.interval,
+                                         args.server_pid if args.url else server.pid))
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait()
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
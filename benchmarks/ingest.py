@@ -0,0 +1,70 @@
+"""Backend ingest benchmark: time to store one report as a device's history grows.
+
+Compares the report store with the old approach of rewriting devices/<serial>.json.
+
+    python benchmarks/ingest.py [--sizes 10 1000 100000] [--legacy-limit 2000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+from benchmarks.payloads import report  # noqa: E402
+
+SAMPLES = 20
+
+
+def legacy_append(path, entry):
+    existing = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            existing = json.load(f)
+    existing.append(entry)
+    with open(path, "w") as f:
+        json.dump(existing, f, indent=4)
+
+
+def measure(store_report, entry, samples=SAMPLES):
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        store_report(entry)
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 1000, 100000])
+    parser.add_argument("--legacy-limit", type=int, default=2000, help="largest history to time the JSON file rewrite at")
+    args = parser.parse_args()
+
+    # A small report keeps filling 100k rows quick; the per-report cost is what's being compared
+    entry = {"schedule": "1", "data": report("small")["cpu_usage"], "timestamp": time.time()}
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = storage.ReportStore(os.path.join(directory, "reports.db"))
+        legacy_file = os.path.join(directory, "legacy.json")
+        stored = 0
+        for size in sorted(args.sizes):
+            store.append_many([("bench", entry)] * (size - stored))
+            stored = size
+            results[size] = {"store_append_ms": measure(lambda e: store.append("bench", e), entry)}
+            stored += SAMPLES
+
+            if size <= args.legacy_limit:
+                with open(legacy_file, "w") as f:
+                    json.dump([entry] * size, f)
+                results[size]["legacy_json_append_ms"] = measure(lambda e: legacy_append(legacy_file, e), entry, samples=5)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Synthetic but representative collector payloads, sized like small, typical and huge machines."""
+import random
+
+SIZES = {
+    "small": {"software": 60, "drivers": 150, "processes": 80, "devices": 40},
+    "typical": {"software": 250, "drivers": 600, "processes": 250, "devices": 150},
+    "huge": {"software": 1200, "drivers": 3000, "processes": 900, "devices": 600},
+}
+
+VENDORS = ["Microsoft Corporation", "Intel Corporation", "NVIDIA", "Realtek", "Google LLC", "Adobe Inc.", "Dell Inc."]
+CLASSES = ["SYSTEM", "NET", "DISPLAY", "USB", "HIDClass", "MEDIA", "DiskDrive", "Processor"]
+
+
+def software(count, rng):
+    return [
+        {
+            "DisplayName": f"Application {i} {rng.choice(['Runtime', 'Tools', 'Update', 'Driver Package'])}",
+            "DisplayVersion": f"{rng.randint(1, 30)}.{rng.randint(0, 99)}.{rng.randint(0, 9999)}",
+            "Publisher": rng.choice(VENDORS),
+            "InstallDate": f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            "InstallLocation": f"C:\\Program Files\\Vendor{i % 40}\\App{i}",
+            "UninstallString": f"MsiExec.exe /X{{{rng.getrandbits(128):032X}}}",
+            "EstimatedSize": str(rng.randint(100, 2_000_000)),
+        }
+        for i in range(count)
+    ]
+
+
+def drivers(count, rng):
+    return [
+        {
+            "name": f"{rng.choice(CLASSES).title()} Device {i}",
+            "version": f"10.0.{rng.randint(10000, 26000)}.{rng.randint(1, 5000)}",
+            "manufacturer": rng.choice(VENDORS),
+            "release_date": f"/Date({rng.randint(1_300_000_000, 1_700_000_000)}000)/",
+            "device_class": rng.choice(CLASSES),
+            "provider": rng.choice(VENDORS),
+            "inf_name": f"oem{rng.randint(0, 300)}.inf",
+            "hardware_id": f"PCI\\VEN_{rng.randint(0, 0xFFFF):04X}&DEV_{rng.randint(0, 0xFFFF):04X}",
+            "is_signed": True,
+            "digital_signer": "Microsoft Windows Hardware Compatibility Publisher",
+            "oem_inf": None,
+        }
+        for i in range(count)
+    ]
+
+
+def processes(count, rng):
+    names = ["svchost.exe", "chrome.exe", "explorer.exe", "RuntimeBroker.exe", "conhost.exe", "Teams.exe", "python.exe"]
+    return [
+        {
+            "pid": 4 + i * 4,
+            "name": (name := rng.choice(names)),
+            "exe": f"C:\\Windows\\System32\\{name}",
+            "username": rng.choice(["NT AUTHORITY\\SYSTEM", "CORP\\alex", "NT AUTHORITY\\LOCAL SERVICE"]),
+            "status": "running",
+            "cpu_percent": round(rng.random() * 5, 1),
+            "memory": rng.randint(1, 800),
+        }
+        for i in range(count)
+    ]
+
+
+def peripheral_devices(count, rng):
+    return [
+        {"name": f"{rng.choice(CLASSES).title()} Device {i}", "id": f"USB\\VID_{rng.randint(0, 0xFFFF):04X}\\{i}"}
+        for i in range(count)
+    ]
+
+
+def report(size="typical", seed=0):
+    """A full get_info("all")-shaped payload for a machine of the given size."""
+    rng = random.Random(seed)
+    counts = SIZES[size]
+    return {
+        "memory": [{"size": "16.00 GB", "manufacturer": "Samsung", "speed": "3200 MHz"}] * 2,
+        "storage": {"C:\\": {"total": "475.84 GB", "free": "120.31 GB"}},
+        "serial_number": f"SN{seed:08d}",
+        "cpu": [{"name": "Intel(R) Core(TM) i7-1185G7 @ 3.00GHz", "cores": 4, "speed": "3000 MHz", "usage": "12.5%"}],
+        "installed_software": software(counts["software"], rng),
+        "installed_drivers": drivers(counts["drivers"], rng),
+        "running_processes": processes(counts["processes"], rng),
+        "peripheral_devices": peripheral_devices(counts["devices"], rng),
+        "cpu_usage": {"cpu_usage_percent": 12.5, "cpu_usage_min": 3.0, "cpu_usage_max": 40.0, "cpu_usage_avg": 11.2},
+        "battery_status": {"percent": 80, "power_plugged": True, "secsleft": "Unlimited"},
+    }
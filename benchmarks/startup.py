@@ -0,0 +1,53 @@
+"""Agent startup benchmark: import cost of get_info and of loading collectors on first use.
+
+Each measurement runs in a fresh interpreter so module caching doesn't hide import time.
+
+    python benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import json, time
+start = time.perf_counter()
+import get_info
+imported = time.perf_counter()
+loaded = {}
+for name in %r:
+    t = time.perf_counter()
+    get_info.available_methods[name].load()
+    loaded[name] = time.perf_counter() - t
+print(json.dumps({"import_get_info": imported - start, "first_load": loaded}))
+"""
+
+
+def measure(collectors):
+    output = subprocess.check_output([sys.executable, "-c", SNIPPET % (collectors,)], cwd=ROOT, text=True)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--collectors", nargs="*", default=["storage", "running_processes", "cpu_usage"])
+    args = parser.parse_args()
+
+    runs = [measure(args.collectors) for _ in range(args.runs)]
+    result = {
+        "import_get_info_ms": round(statistics.median(r["import_get_info"] for r in runs) * 1000, 2),
+        "first_load_ms": {
+            name: round(statistics.median(r["first_load"][name] for r in runs) * 1000, 2)
+            for name in args.collectors
+        },
+    }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    main()
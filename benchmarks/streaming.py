@@ -0,0 +1,150 @@
+"""Peak memory and time-to-first-record of the streamed PowerShell collectors.
+
+Feeds the huge fixture's drivers, PnP devices and network adapters (times --scale) through a
+real pipe from a child process standing in for PowerShell, and compares reading them line by
+line with the old approach: the whole ConvertTo-Json array captured, parsed, then copied.
+
+    python benchmarks/streaming.py [--size huge] [--scale 10] [--record-us 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+COLLECTORS = {
+    "installed_drivers": ("collectors.software", "SoftwareInfo", "iter_installed_drivers"),
+    "peripheral_devices": ("collectors.hardware", "HardwareInfo", "iter_peripheral_devices"),
+    "network_adapters": ("collectors.network", "NetworkInfo", "iter_network_adapters"),
+}
+
+# Stands in for PowerShell: ForEach-Object writes each object as it is enumerated, while a
+# plain ConvertTo-Json collects the whole pipeline and writes the array at the end
+PRODUCER = """
+import sys, time
+path, mode, delay = sys.argv[1], sys.argv[2], float(sys.argv[3])
+with open(path) as f:
+    if mode == "array":
+        records = sum(1 for line in f if line.startswith("    {"))
+        time.sleep(delay * records)
+        f.seek(0)
+        sys.stdout.write(f.read())
+    else:
+        started = time.perf_counter()
+        for i, line in enumerate(f):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            time.sleep(max(started + (i + 1) * delay - time.perf_counter(), 0))
+"""
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import psutil
+    return psutil.Process().memory_info().rss / 1024**2
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024**2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def write_fixture(directory, size, scale):
+    """Line and array versions of each query's output; returns {name: (lines path, array path, records)}."""
+    from benchmarks.fixtures import powershell_outputs
+
+    outputs = powershell_outputs(size)
+    files = {}
+    for name in COLLECTORS:
+        records = [json.loads(line) for line in outputs[name].splitlines()] * scale
+        lines, array = os.path.join(directory, f"{name}.jsonl"), os.path.join(directory, f"{name}.json")
+        with open(lines, "w") as f:
+            f.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with open(array, "w") as f:
+            json.dump(records, f, indent=4)
+        files[name] = (lines, array, len(records))
+    return files
+
+
+def run(name, mode, path, delay):
+    """One measurement in a fresh interpreter, so the peak RSS belongs to it alone."""
+    from benchmarks import fixtures
+    fixtures.install("small")
+
+    import importlib
+    import powershell
+
+    args = [sys.executable, "-c", PRODUCER, path, mode, str(delay)]
+    before = rss_mb()
+    started = time.perf_counter()
+
+    if mode == "stream":
+        powershell.set_command_runner(
+            lambda _, check=True, timeout=None: "",
+            streaming_runner=lambda _, timeout=None: powershell.default_stream_runner(args, timeout)
+        )
+        module, cls, method = COLLECTORS[name]
+        records = getattr(getattr(importlib.import_module(module), cls), method)()
+        first = next(records)
+        first_seconds = time.perf_counter() - started
+        records = [first, *records]  # kept, as the collector's list() does
+    else:
+        # The collectors before streaming: whole output, whole parsed list, then a copy of each item
+        output = powershell.default_runner(args)
+        data = json.loads(output)
+        records = [{key.lower(): value for key, value in item.items()} for item in data]
+        first_seconds = time.perf_counter() - started
+        del output, data
+
+    return {
+        "records": len(records),
+        "first_record_ms": round(first_seconds * 1000, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_growth_mb": round(peak_rss_mb() - before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="huge", choices=["small", "typical", "huge"])
+    parser.add_argument("--scale", type=int, default=10, help="repeat the fixture's records this many times")
+    parser.add_argument("--record-us", type=float, default=50, help="microseconds PowerShell takes per record")
+    parser.add_argument("--run", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        name, mode, path, delay = args.run
+        print(json.dumps(run(name, mode, path, float(delay))))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (lines, array, records) in write_fixture(directory, args.size, args.scale).items():
+            results[name] = {"records": records}
+            for mode, path in (("stream", lines), ("array", array)):
+                command = [sys.executable, os.path.abspath(__file__), "--run", name, mode, path, str(args.record_us / 1e6)]
+                results[name][mode] = json.loads(subprocess.check_output(command, cwd=ROOT, text=True))
+            print(json.dumps({name: results[name]}), file=sys.stderr)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Agent benchmark suite over canned collector outputs; runs on any platform.
+
+Measures, for small, typical and huge machines (see benchmarks/fixtures.py):
+per-collector parse time, get_info end-to-end latency (fresh, cached, and after the cache
+expired with collector probes unchanged), scheduler tick
+overhead and report payload sizes. Results are saved so versions can be compared:
+
+    python benchmarks/suite.py [--label NAME] [--compare benchmarks/results/OTHER.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+
+SIZES = ("small", "typical", "huge")
+REPEAT = 7
+# Collectors that reach outside the fixtures (the network, netsh, nvidia-smi, C:\Windows)
+EXCLUDED = {"public_ip", "wifi_ssid", "gpu", "os_install_date"}
+REGRESSION = 1.10  # a metric this much worse than the baseline is flagged
+
+
+def median_ms(function, repeat=REPEAT):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def scheduler_tick_us(schedule_count=50, ticks=2000):
+    """Average cost of one scheduler wake-up: find what's due, mark it sent, find the next due time."""
+    import scheduler
+
+    now = [1_700_000_000.0]
+    with tempfile.TemporaryDirectory() as directory:
+        schedules = scheduler.Scheduler(directory, os.path.join(directory, "last_sent.json"), clock=lambda: now[0])
+        for i in range(schedule_count):
+            schedules.update(f"{i}.json", {"interval": 60 * (1 + i % 10), "details_required": ["cpu_usage"]})
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for name in schedules.pop_due():
+                schedules.mark_sent(name)
+            now[0] = max(schedules.next_due(), now[0] + 1)
+        return round((time.perf_counter() - start) / ticks * 1e6, 2)
+
+
+def payload_bytes(info):
+    import delta
+    import schema
+    import wire
+
+    sizes = {
+        "json_legacy": len(json.dumps(schema.render(info, schema.LEGACY), default=str).encode()),
+        "json_raw": len(json.dumps(info, default=str).encode()),
+    }
+    for encoding in wire.encoders:
+        for compression in wire.compressors:
+            sizes[f"{encoding}+{compression}"] = len(wire.encode(info, encoding, compression))
+
+    # A second report where one process has gone: the delta is what gets sent
+    reporter = delta.DeltaReporter()
+    first = reporter.build("bench", info)
+    reporter.acknowledge("bench", {"status": "ok", "seq": first["seq"]})
+    changed = {**info, "running_processes": info.get("running_processes", [])[1:]}
+    sizes["delta_json"] = len(json.dumps(reporter.build("bench", changed), default=str).encode())
+    return sizes
+
+
+def expired_copy(cache, directory):
+    """A copy of the cache's entries, each dated just past its TTL (but within the probes' maximum age)."""
+    import registry
+    from cache import TTL_CLASSES, CollectorCache
+
+    expired = CollectorCache(os.path.join(directory, "expired.json"))
+    now = time.time()
+    expired.entries = {
+        key: {**entry, "time": now - TTL_CLASSES[registry.get(key).ttl] - 1} for key, entry in cache.entries.items()
+    }
+    return expired
+
+
+def run_size(size, recorded=None):
+    """Every measurement for one machine size; runs in its own interpreter (see main)."""
+    # Before the agent modules configure logging to files under C:/ProgramData
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    from benchmarks import fixtures
+    fixtures.install(size, recorded)
+
+    import get_info
+    import powershell
+    import registry
+    import sampler
+    from cache import CollectorCache
+
+    # Two samples, so cpu_stats() doesn't fall back to its blocking probe
+    sampler.default_sampler.sample()
+    sampler.default_sampler.sample()
+
+    names = [name for name in registry.available("windows") if name not in EXCLUDED]
+    collectors_ms = {}
+    for name in names:
+        with powershell.batch(get_info.collector_queries([name])):
+            collectors_ms[name] = median_ms(get_info.available_methods[name])
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CollectorCache(os.path.join(directory, "cache.json"))
+        get_info_ms = {
+            "fresh": median_ms(lambda: get_info.collect_info(*names, cache=cache, refresh=True)),
+            "cached": median_ms(lambda: get_info.collect_info(*names, cache=cache)),
+        }
+        # Every entry past its TTL: collectors with a probe are skipped, the rest run
+        get_info_ms["probed"] = median_ms(lambda: get_info.collect_info(*names, cache=expired_copy(cache, directory)))
+        info, _ = get_info.collect_info(*names, cache=cache, refresh=True)
+
+    return {
+        "collectors_ms": collectors_ms,
+        "get_info_ms": get_info_ms,
+        "scheduler_tick_us": scheduler_tick_us(),
+        "payload_bytes": payload_bytes(info),
+    }
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def compare(current, baseline_path):
+    """Print each metric against the baseline; returns the metrics that regressed."""
+    with open(baseline_path, "r") as f:
+        baseline = dict(flatten(json.load(f)["results"]))
+
+    regressions = []
+    for metric, value in flatten(current):
+        before = baseline.get(metric)
+        if not before or not isinstance(value, (int, float)):
+            continue
+        ratio = value / before
+        flag = ""
+        if ratio > REGRESSION:
+            regressions.append(metric)
+            flag = "  <-- regression"
+        print(f"{metric:60} {before:>12} -> {value:>12}  ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def label():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d-%H%M%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="*", default=list(SIZES), choices=SIZES)
+    parser.add_argument("--recorded", help="directory of outputs saved with benchmarks/fixtures.py record")
+    parser.add_argument("--label", default=None, help="name for the saved results (default: git describe)")
+    parser.add_argument("--output", default=None, help="where to save results (default: benchmarks/results/LABEL.json)")
+    parser.add_argument("--compare", default=None, help="earlier results to compare against")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_size(args.run, args.recorded)))
+        return
+
+    # One interpreter per size: the fixtures replace modules that can't be swapped back out
+    results = {}
+    for size in args.sizes:
+        command = [sys.executable, os.path.abspath(__file__), "--run", size]
+        if args.recorded:
+            command += ["--recorded", args.recorded]
+        results[size] = json.loads(subprocess.check_output(command, cwd=ROOT, text=True))
+
+    name = args.label or label()
+    output = args.output or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"label": name, "python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=4)
+    print(json.dumps(results, indent=4))
+    print(f"Saved to {output}")
+
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Bytes on the wire and encode/decode CPU time for each available wire format.
+
+    python benchmarks/wire_format.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wire  # noqa: E402
+from benchmarks.payloads import report  # noqa: E402
+
+
+def measure(payload, encoding, compression, repeat):
+    encode_times, decode_times = [], []
+    for _ in range(repeat):
+        start = time.process_time()
+        frame = wire.encode(payload, encoding, compression)
+        encode_times.append(time.process_time() - start)
+        start = time.process_time()
+        wire.decode(frame)
+        decode_times.append(time.process_time() - start)
+    return {
+        "bytes": len(frame),
+        "encode_ms": round(min(encode_times) * 1000, 2),
+        "decode_ms": round(min(decode_times) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = {size: report(size) for size in ("small", "typical", "huge")}
+    # Several schedule reports packed into one frame
+    payloads["batch_of_4_typical"] = {"reports": [{"schedule": str(i), "data": report("typical", i)} for i in range(4)]}
+
+    results = {}
+    for name, payload in payloads.items():
+        results[name] = {"legacy_json_bytes": len(json.dumps(payload).encode())}
+        for encoding in wire.encoders:
+            for compression in wire.compressors:
+                results[name][f"{encoding}+{compression}"] = measure(payload, encoding, compression, args.repeat)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
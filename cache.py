@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import threading
+import time
+import schema
+
+MAIN_DIR = "C:/ProgramData/TrackIt"
+CACHE_FILE = os.path.join(MAIN_DIR, "collector_cache.json")
+
+# How long a collector's result may be reused, in seconds, by the TTL class it declares
+TTL_CLASSES = {
+    "static": 24 * 3600,
+    "slow": 3600,
+    "volatile": 0,
+}
+# A result reused because its probe reads the same is still collected in full once it is this many TTLs old,
+# in case the probe missed a change
+PROBE_MAX_AGE = 4
+
+
+class CollectorCache:
+    """Collector results kept on disk so they survive agent restarts."""
+
+    def __init__(self, path=CACHE_FILE, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.entries = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key, ttl_class):
+        """Return (True, value, age) for a fresh entry, else (False, None, None)."""
+        ttl = TTL_CLASSES.get(ttl_class, 0)
+        if ttl <= 0:
+            return False, None, None
+
+        with self.lock:
+            self._load()
+            entry = self.entries.get(key)
+
+        # Entries written by collectors producing a different data shape don't count
+        if entry is None or entry.get("schema", schema.LEGACY) != schema.VERSION:
+            return False, None, None
+
+        age = self.clock() - entry["time"]
+        if age < 0 or age >= ttl:
+            return False, None, None
+        return True, entry["value"], age
+
+    def probed(self, key, fingerprint, ttl_class):
+        """Return (True, value, age) when the entry was stored with the same probe fingerprint
+        and is less than PROBE_MAX_AGE TTLs old, else (False, None, None)."""
+        with self.lock:
+            self._load()
+            entry = self.entries.get(key)
+        if entry is None or entry.get("schema", schema.LEGACY) != schema.VERSION or entry.get("probe") != fingerprint:
+            return False, None, None
+
+        age = self.clock() - entry["time"]
+        if age < 0 or age >= TTL_CLASSES.get(ttl_class, 0) * PROBE_MAX_AGE:
+            return False, None, None
+        return True, entry["value"], age
+
+    def put(self, key, value, ttl_class, fingerprint=None):
+        """Store a freshly collected value. Its time is when it was collected, which is what both TTLs count from."""
+        if TTL_CLASSES.get(ttl_class, 0) <= 0 and fingerprint is None:
+            return
+        with self.lock:
+            self._load()
+            self.entries[key] = {"time": self.clock(), "schema": schema.VERSION, "value": value}
+            if fingerprint is not None:
+                self.entries[key]["probe"] = fingerprint
+            self.dirty = True
+
+    def invalidate(self, keys=None):
+        """Drop the given keys, or everything when keys is None."""
+        with self.lock:
+            self._load()
+            for key in list(self.entries) if keys is None else keys:
+                self.dirty |= self.entries.pop(key, None) is not None
+
+    def save(self):
+        """Write the cache out if anything changed, replacing the file atomically."""
+        with self.lock:
+            if not self.dirty:
+                return
+            temp_path = f"{self.path}.tmp"
+            try:
+                with open(temp_path, "w") as f:
+                    json.dump(self.entries, f)
+                os.replace(temp_path, self.path)
+                self.dirty = False
+            except (OSError, TypeError) as e:
+                logging.warning(f"Could not save collector cache: {e}")
+
+
+default_cache = CollectorCache()
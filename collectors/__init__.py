@@ -0,0 +1,29 @@
+"""Collector implementations, loaded by registry on first use.
+
+A collector that can't read its source still returns a result in its usual shape (e.g. "Unknown"),
+so reports keep their layout. It passes that stand-in through failed(), so the collection can tell
+it apart from a real reading: it is reported as an error and never cached.
+"""
+import contextlib
+import contextvars
+
+_failures = contextvars.ContextVar("collector_failures", default=None)
+
+
+def failed(placeholder, error=None):
+    """Return placeholder, telling the collection in progress (see watch()) the collector failed."""
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(str(error) if error is not None else "no data")
+    return placeholder
+
+
+@contextlib.contextmanager
+def watch():
+    """Yield a list that failed() calls in the block add their errors to."""
+    failures = []
+    token = _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _failures.reset(token)
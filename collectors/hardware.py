@@ -0,0 +1,175 @@
+import json
+import subprocess
+import psutil
+from collectors import failed
+from collectors.queries import run_powershell, stream_powershell
+from powershell import CREATE_NO_WINDOW
+from sampler import cpu_stats
+
+
+class HardwareInfo:
+    @staticmethod
+    def get_memory_details():
+        try:
+            output = run_powershell("memory").strip()
+
+            if not output:
+                return failed([{"size": None, "manufacturer": None, "speed": None}])
+
+            ram_details = [
+                {
+                    "size": int(capacity),
+                    "manufacturer": manufacturer if manufacturer else None,
+                    "speed": int(speed) * 10**6 if speed.isdigit() else None
+                }
+                for line in output.split("\n") if (parts := line.split(",")) and len(parts) == 3
+                for capacity, manufacturer, speed in [parts]
+            ]
+
+            return ram_details
+
+        except subprocess.CalledProcessError as e:
+            return failed([{"size": None, "manufacturer": None, "speed": None}], e)
+
+    @staticmethod
+    def get_storage_details():
+        disks = {}
+        try:
+            partitions = psutil.disk_partitions()
+            for partition in partitions:
+                try:
+                    usage = psutil.disk_usage(partition.mountpoint)
+                    disks[partition.device] = {
+                        "total": usage.total,
+                        "free": usage.free
+                    }
+                except PermissionError:
+                    continue
+        except Exception as e:
+            return failed({"Unknown": {"total": None, "free": None}}, e)
+
+        return disks
+
+    @staticmethod
+    def get_serial_number():
+        try:
+            output = run_powershell("serial_number").strip()
+
+            return output if output else failed("Unknown")
+
+        except subprocess.CalledProcessError as e:
+            return failed("Unknown", e)
+
+    @staticmethod
+    def get_motherboard_details():
+        try:
+            output = run_powershell("motherboard").strip()
+
+            if not output:
+                return failed({"manufacturer": "Unknown", "product": "Unknown"})
+
+            # Split output by comma
+            manufacturer, product = output.split(",", 1)
+
+            return {
+                "manufacturer": manufacturer.strip() if manufacturer else "Unknown",
+                "product": product.strip() if product else "Unknown"
+            }
+
+        except subprocess.CalledProcessError as e:
+            return failed({"manufacturer": "Unknown", "product": "Unknown"}, e)
+
+    @staticmethod    
+    def get_monitor_details():
+        try:
+            output = run_powershell("monitor")
+            data = json.loads(output)
+            if isinstance(data, dict):
+                data = [data]
+            return [{"name": mon["Name"], "width": mon["ScreenWidth"], "height": mon["ScreenHeight"]} for mon in data]
+        except Exception as e:
+            return failed([], e)
+
+    @staticmethod
+    def get_cpu_details():
+        try:
+            output = run_powershell("cpu")
+            data = json.loads(output)
+            if isinstance(data, dict):
+                data = [data]
+            usage = cpu_stats()["current"]
+            return [{
+                "name": cpu["Name"].strip(),
+                "cores": cpu["NumberOfCores"],
+                "speed": cpu["MaxClockSpeed"] * 10**6,
+                "usage": float(usage)
+            } for cpu in data]
+        except Exception as e:
+            return failed([{"name": None, "cores": 0, "speed": None, "usage": None}], e)
+
+    @staticmethod
+    def get_gpu_details():
+        
+        def get_total_system_ram():
+            """Get total physical RAM in bytes."""
+            try:
+                output = run_powershell("total_memory")
+                data = json.loads(output)
+                total_mem_kb = data["TotalVisibleMemorySize"]  # in KB
+                return int(total_mem_kb) * 1024
+            except Exception:
+                return 0
+        
+        gpu_list = []
+        
+        # Step 1: Get all GPUs from WMI
+        try:
+            output = run_powershell("gpu")
+            wmi_data = json.loads(output)
+            if isinstance(wmi_data, dict):
+                wmi_data = [wmi_data]
+        except Exception as e:
+            wmi_data = failed([{"Name": "Unknown", "AdapterRAM": 0}], e)
+        
+        # Step 2: Get NVIDIA-specific data from nvidia-smi
+        nvidia_data = {}
+        try:
+            output = subprocess.check_output("nvidia-smi --query-gpu=name,memory.total --format=csv,noheader", text=True, shell=True, creationflags=CREATE_NO_WINDOW)
+            for line in output.strip().splitlines():
+                name, memory = line.split(", ")
+                nvidia_data[name] = int(memory.split()[0]) * 1024**2  # MiB
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            nvidia_data = {}
+
+        # Step 3: Combine data with shared memory heuristic
+        total_ram = get_total_system_ram()
+        shared_mem_limit = min(8 * 1024**3, total_ram // 2)  # Cap at 8 GB or 50% of total RAM, per Intel defaults
+        
+        for gpu in wmi_data:
+            name = gpu.get("Name", "Unknown")
+            ram_bytes = gpu.get("AdapterRAM", 0)
+            
+            shared = False
+            if name in nvidia_data:
+                ram = nvidia_data[name]  # Use nvidia-smi for NVIDIA GPUs
+            elif "Intel" in name or "UHD" in name or "Integrated" in name:
+                ram, shared = shared_mem_limit, True  # Use capped shared memory
+            else:
+                ram = int(ram_bytes) if ram_bytes else None
+            
+            gpu_list.append({"name": name, "ram": ram, "shared": shared})
+        
+        return gpu_list
+
+    @staticmethod
+    def iter_peripheral_devices():
+        """Devices, yielded as PowerShell writes them."""
+        for device in stream_powershell("peripheral_devices"):
+            yield {"name": device["Name"], "id": device["DeviceID"]}
+
+    @staticmethod
+    def get_peripheral_devices():
+        try:
+            return list(HardwareInfo.iter_peripheral_devices())
+        except Exception as e:
+            return failed([], e)
@@ -0,0 +1,77 @@
+import json
+import subprocess
+from urllib import request
+from collectors import failed
+from collectors.queries import run_powershell, stream_powershell
+from powershell import CREATE_NO_WINDOW
+
+
+class NetworkInfo:
+    @staticmethod
+    def iter_network_adapters():
+        """Network adapters, yielded as PowerShell writes them."""
+
+        def parse_adapter_status(status_code):
+            """Convert NetConnectionStatus code to readable status."""
+            status_mapping = {
+                0: "Disconnected",
+                1: "Connecting",
+                2: "Connected",
+                3: "Disconnecting",
+                4: "Hardware not present",
+                5: "Hardware disabled",
+                6: "Hardware malfunction",
+                7: "Media disconnected",
+                8: "Authenticating",
+                9: "Authentication succeeded",
+                10: "Authentication failed",
+            }
+            return status_mapping.get(status_code, "Unknown")
+
+        for adapter in stream_powershell("network_adapters"):
+            yield {
+                "name": adapter.get("Name", "Unknown"),
+                "mac_address": adapter.get("MACAddress", "N/A"),
+                "status": parse_adapter_status(adapter.get("NetConnectionStatus")),
+                "type": adapter.get("AdapterType", "Unknown"),
+                "speed": int(adapter["Speed"]) if adapter.get("Speed") else None  # bits/s
+            }
+
+    @staticmethod
+    def get_network_adapters():
+        """Fetch all network adapters (active + inactive) with details."""
+        try:
+            adapters = list(NetworkInfo.iter_network_adapters())
+            return adapters if adapters else failed({"error": "No network adapters found."})
+
+        except Exception as e:
+            return failed({"error": str(e)}, e)
+    
+    @staticmethod
+    def get_public_ip():
+        try:
+            response = request.get("https://api.ipify.org?format=json")
+            return response.json()["ip"]
+        except Exception as e:
+            return failed("Unknown", e)
+        
+    @staticmethod
+    def get_wifi_ssid():
+        try:
+            output = subprocess.check_output("netsh wlan show interfaces", text=True, creationflags=CREATE_NO_WINDOW)
+            for line in output.splitlines():
+                if "SSID" in line and "BSSID" not in line:
+                    return line.split(":")[1].strip()
+            return "Not connected to Wi-Fi"
+        except Exception as e:
+            return failed("Unknown", e)
+
+    @staticmethod
+    def get_vpn_status():
+        try:
+            output = run_powershell("vpn_status")
+            # Get-VpnConnection prints nothing when there are no connections
+            data = json.loads(output) if output.strip() else None
+            return "VPN Active" if data else "No VPN Detected"
+        except Exception as e:
+            return failed("Unknown", e)
@@ -0,0 +1,117 @@
+from datetime import datetime
+import json
+import os
+import subprocess
+import psutil
+from collectors import failed
+from collectors.queries import run_powershell
+from sampler import cpu_stats, memory_stats
+
+try:
+    import winreg
+except ImportError:  # Lets the collectors be exercised with canned output off Windows
+    winreg = None
+
+MAIN_DIR = "C:/ProgramData/TrackIt"
+CONFIG_FILE = os.path.join(MAIN_DIR, "config.json")
+
+
+class OtherInfo:
+    @staticmethod
+    def get_cpu_usage():
+        stats = cpu_stats()
+        return {
+            "cpu_usage_percent": stats["current"],
+            "cpu_usage_min": stats["min"],
+            "cpu_usage_max": stats["max"],
+            "cpu_usage_avg": stats["avg"]
+        }
+
+    @staticmethod
+    def get_memory_usage():
+        stats = memory_stats()
+        return {
+            "memory_available": stats["current"],
+            "memory_available_min": stats["min"],
+            "memory_available_max": stats["max"],
+            "memory_available_avg": stats["avg"],
+            "memory_total": psutil.virtual_memory().total
+        }
+
+    @staticmethod
+    def get_asset_tag():
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                return json.load(f)["asset_tag"]
+        except FileNotFoundError:
+            return "Not Assigned"
+
+    @staticmethod
+    def get_last_boot_time(date_format="%Y-%m-%d", time_format="%H:%M:%S"):
+        """Fetch the system's last boot time in an optimized way."""
+        return datetime.fromtimestamp(psutil.boot_time()).strftime(f"{date_format} {time_format}")
+
+
+    @staticmethod
+    def get_battery_status():
+        """Fetch the battery status efficiently."""
+        if not (battery := psutil.sensors_battery()):
+            return {"status": "No battery detected"}
+
+        return {
+            "percent": battery.percent,
+            "power_plugged": battery.power_plugged,
+            # Seconds; None while charging or when Windows can't estimate it
+            "secsleft": battery.secsleft if battery.secsleft not in (psutil.POWER_TIME_UNLIMITED, psutil.POWER_TIME_UNKNOWN) else None
+        }
+
+    @staticmethod
+    def get_windows_product_key():
+        """Fetch the Windows product key efficiently."""
+        try:
+            output = run_powershell("windows_product_key").strip()
+
+            return output if output else failed("Unknown")
+
+        except subprocess.CalledProcessError as e:
+            return failed("Unknown", e)
+
+class UnusedInfo:
+    @staticmethod
+    def get_tpm_status():
+        try:
+            command = (
+                "$tpm = Get-Tpm; "
+                "if ($tpm) { "
+                "  [PSCustomObject]@{ TpmPresent = $tpm.TpmPresent; TpmReady = $tpm.TpmReady } "
+                "} | ConvertTo-Json -Compress"
+            )
+            
+            output = subprocess.run(
+                ["powershell", "-Command", command], 
+                capture_output=True, text=True
+            )
+            
+            if output.returncode == 0 and output.stdout.strip():
+                data = json.loads(output.stdout)
+                return {
+                    "present": bool(data.get("TpmPresent", False)),
+                    "ready": bool(data.get("TpmReady", False))
+                }
+            else:
+                return {"present": False, "ready": False}
+        
+        except Exception as e:
+            return {"present": False, "ready": False}
+
+    @staticmethod
+    def get_usb_history():
+        usb_list = []
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Enum\USBSTOR") as key:
+                for i in range(winreg.QueryInfoKey(key)[0]):
+                    subkey_name = winreg.EnumKey(key, i)
+                    usb_list.append(subkey_name)
+        except Exception:
+            return ["Unknown"]
+        return usb_list
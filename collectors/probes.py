@@ -0,0 +1,54 @@
+"""Cheap checks whose result changes whenever an expensive collector's would.
+
+A probe returns a JSON-serializable reading. get_info keeps a fingerprint of it with the cached
+result and, while the reading stays the same, reuses that result instead of collecting again.
+Probes read their sources through the same module attributes as the collectors (winreg, psutil,
+PowerShell queries), so the fixtures that fake those for the collectors fake them here too.
+"""
+import psutil
+import collectors.software as software
+from collectors.queries import run_powershell
+
+
+def installed_software():
+    """Subkey count and newest last-write time under each Uninstall key.
+
+    Installing or removing software changes the Uninstall key itself, but an upgrade only
+    rewrites the application's own subkey, so the subkeys' times are read too. That is one
+    QueryInfoKey per entry instead of reading all of its values.
+    """
+    winreg = software.winreg
+    reading = []
+    for hive, keys in software.UNINSTALL_KEYS.items():
+        for path in keys:
+            try:
+                with winreg.OpenKey(getattr(winreg, hive), path) as key:
+                    subkeys, _, modified = winreg.QueryInfoKey(key)
+                    for i in range(subkeys):
+                        try:
+                            with winreg.OpenKey(key, winreg.EnumKey(key, i)) as subkey:
+                                modified = max(modified, winreg.QueryInfoKey(subkey)[2])
+                        except OSError:
+                            continue
+                    reading.append([hive, path, subkeys, modified])
+            except OSError:
+                continue
+    return reading
+
+
+def network_adapters():
+    """Each interface's addresses, link state and speed."""
+    stats = psutil.net_if_stats()
+    return {
+        name: {
+            "addresses": sorted(str(address.address) for address in addresses),
+            "up": stats[name].isup if name in stats else None,
+            "speed": stats[name].speed if name in stats else None,
+        }
+        for name, addresses in psutil.net_if_addrs().items()
+    }
+
+
+def peripheral_devices():
+    """Number of PnP devices with a driver, counted without reading their details."""
+    return int(run_powershell("pnp_count").strip() or 0)
@@ -0,0 +1,55 @@
+import json
+import powershell
+
+# Queries that print one compressed JSON object per line, parsed as they arrive; never batched
+STREAMED = {"peripheral_devices", "installed_drivers", "network_adapters"}
+STREAM_TIMEOUT = 60  # seconds; a streamed query's PowerShell is killed after this, like an overrunning collector
+
+POWERSHELL_QUERIES = {
+    "memory": (
+        "Get-CimInstance Win32_PhysicalMemory | "
+        "ForEach-Object {\"$($_.Capacity),$($_.Manufacturer),$($_.Speed)\"}"
+    ),
+    "serial_number": "Get-CimInstance Win32_BIOS | Select-Object -ExpandProperty SerialNumber",
+    "motherboard": (
+        'Get-CimInstance Win32_BaseBoard | '
+        'ForEach-Object {"$($_.Manufacturer),$($_.Product)"}'
+    ),
+    "monitor": "Get-WmiObject Win32_DesktopMonitor | Where-Object {$_.Availability -eq 3} | Select-Object Name, ScreenWidth, ScreenHeight | ConvertTo-Json",
+    "cpu": "Get-WmiObject Win32_Processor | Select-Object Name, NumberOfCores, MaxClockSpeed | ConvertTo-Json",
+    "gpu": "Get-WmiObject Win32_VideoController | Select-Object Name, AdapterRAM | ConvertTo-Json",
+    "total_memory": "Get-WmiObject Win32_OperatingSystem | Select-Object TotalVisibleMemorySize | ConvertTo-Json",
+    "peripheral_devices": "Get-WmiObject Win32_PnPEntity | Where-Object {$_.Service -ne $null} | Select-Object Name, DeviceID | ForEach-Object { $_ | ConvertTo-Json -Compress }",
+    "pnp_count": "@(Get-CimInstance Win32_PnPEntity -Property Service | Where-Object {$_.Service -ne $null}).Count",
+    "windows_update_status": "Get-WmiObject -Class Win32_QuickFixEngineering | Select-Object -Last 1 | Select-Object InstalledOn | ConvertTo-Json",
+    "installed_drivers": """
+            Get-WmiObject Win32_PnPSignedDriver | 
+            Select-Object DeviceName, DriverVersion, Manufacturer, DriverDate, DeviceClass, DriverProviderName, InfName, HardwareID, IsSigned, DigitalSigner, OEMINF | 
+            ForEach-Object { $_ | ConvertTo-Json -Compress -Depth 2 }
+            """,
+    "network_adapters": """
+            Get-CimInstance Win32_NetworkAdapter | 
+            Select-Object Name, MACAddress, NetConnectionStatus, AdapterType, Speed | 
+            ForEach-Object { $_ | ConvertTo-Json -Compress -Depth 2 }
+            """,
+    "vpn_status": "Get-WmiObject Win32_NetworkAdapterConfiguration | Where-Object {$_.Description -like '*VPN*'} | Select-Object Description | ConvertTo-Json",
+    "antivirus": "Get-WmiObject -Namespace 'root\\SecurityCenter2' -Class AntiVirusProduct | Select-Object displayName | ConvertTo-Json",
+    "firewall": "Get-NetFirewallProfile | Select-Object Name, Enabled | ConvertTo-Json",
+    "bitlocker_status": "Get-BitLockerVolume | Select-Object MountPoint, ProtectionStatus | ConvertTo-Json",
+    "windows_product_key": (
+        'Get-CimInstance -Query "SELECT OA3xOriginalProductKey FROM SoftwareLicensingService" | '
+        'Select-Object -ExpandProperty OA3xOriginalProductKey'
+    ),
+}
+
+
+def run_powershell(name, check=True):
+    """Output of a named query, served from the active batch when it covers it."""
+    return powershell.lookup(name, POWERSHELL_QUERIES[name], check=check)
+
+
+def stream_powershell(name, timeout=STREAM_TIMEOUT):
+    """Objects of a STREAMED query, parsed one output line at a time as PowerShell writes them."""
+    for line in powershell.lookup_lines(name, POWERSHELL_QUERIES[name], timeout=timeout):
+        if line.strip():
+            yield json.loads(line)
@@ -0,0 +1,36 @@
+import json
+import eventlog
+from collectors import failed
+from collectors.queries import run_powershell
+
+
+class SecurityInfo:
+    @staticmethod
+    def get_antivirus_details():
+        try:
+            output = run_powershell("antivirus")
+            data = json.loads(output)
+            if isinstance(data, dict):
+                data = [data]
+            return [av["displayName"] for av in data] if data else ["No AV detected"]
+        except Exception as e:
+            return failed(["Unknown"], e)
+        
+    @staticmethod
+    def get_firewall_details():
+        try:
+            output = run_powershell("firewall")
+            data = json.loads(output)
+            if isinstance(data, dict):
+                data = [data]
+            return {profile["Name"]: profile["Enabled"] for profile in data}
+        except Exception as e:
+            return failed({"Unknown": False}, e)
+
+    @staticmethod
+    def get_security_events():
+        """Failed logons, lockouts, account changes and log clears not yet delivered to the schedule."""
+        try:
+            return eventlog.default_reader.read("security_events")
+        except Exception as e:
+            return failed([], e)
@@ -0,0 +1,143 @@
+from datetime import datetime
+import json
+import os
+from itertools import chain
+import processes
+from collectors import failed
+from collectors.queries import run_powershell, stream_powershell
+
+try:
+    import winreg
+except ImportError:  # Lets the collectors be exercised with canned output off Windows
+    winreg = None
+
+# Hive -> Uninstall keys under it that list installed software
+UNINSTALL_KEYS = {
+    "HKEY_LOCAL_MACHINE": [
+        r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
+        r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall",
+    ],
+    "HKEY_CURRENT_USER": [
+        r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+    ],
+}
+
+
+class SoftwareInfo:
+    @staticmethod
+    def get_os_install_date(time_format="%Y-%m-%d %H:%M:%S"):
+        try:
+            windows_path = r"C:\Windows"
+            creation_time = os.path.getctime(windows_path)
+            return datetime.fromtimestamp(creation_time).strftime(time_format)
+        except Exception as e:
+            return failed("Unknown", e)
+
+    @staticmethod
+    def get_installed_software():
+        """Retrieve a unique list of installed software from Windows registry."""
+        registry_paths = {getattr(winreg, hive): keys for hive, keys in UNINSTALL_KEYS.items()}
+
+        software_list = []
+        seen_software = []
+
+        def process_registry_keys(hive, keys):
+            temp_list = []
+
+            for uninstall_key in keys:
+                try:
+                    with winreg.OpenKey(hive, uninstall_key) as key:
+                        for i in range(winreg.QueryInfoKey(key)[0]):
+                            try:
+                                subkey_name = winreg.EnumKey(key, i)
+                                with winreg.OpenKey(key, subkey_name) as subkey:
+                                    
+                                    subkey_values = {
+                                        winreg.EnumValue(subkey, j)[0]: str(winreg.EnumValue(subkey, j)[1])
+                                        for j in range(winreg.QueryInfoKey(subkey)[1] )
+                                    }
+                                    
+                                    name = subkey_values.get("DisplayName")
+                                    if not name:
+                                        continue
+                                    
+                                    version = subkey_values.get("DisplayVersion", "Unknown")
+                                    software_key = (name, version)
+                                    
+                                    # if software_key in seen_software:
+                                    #     continue
+                                    seen_software.append(name)
+                                    
+                                    temp_list.append(subkey_values)
+                            except OSError:
+                                continue
+                except PermissionError:
+                    continue
+            return temp_list
+
+        software_list = list(chain.from_iterable(process_registry_keys(hive, keys) for hive, keys in registry_paths.items()))
+
+        return software_list
+
+    @staticmethod
+    def get_running_processes():
+        return [
+            {
+                "pid": proc["pid"],
+                "name": proc["name"],
+                "exe": proc["exe"],  # Executable path
+                "username": proc["username"],  # User running the process
+                "status": proc["status"],  # Process status
+                "cpu_percent": proc["cpu_percent"],  # CPU usage since the previous snapshot
+                "rss": proc["rss"]  # Resident memory in bytes
+            }
+            for proc in processes.default_tracker.snapshot()
+        ]
+
+    @staticmethod
+    def get_process_table():
+        """Running processes as parallel arrays with a shared string table."""
+        return processes.columnar(processes.default_tracker.snapshot())
+
+    @staticmethod
+    def get_process_changes():
+        """Processes started, exited or changed since the last process_changes report of the schedule."""
+        return processes.default_tracker.changes()
+
+    @staticmethod
+    def get_windows_update_status():
+        try:
+            output = run_powershell("windows_update_status")
+            data = json.loads(output)
+            return {"last_update": data['InstalledOn']['DateTime']} if data else {"last_update": "Unknown"}
+        except Exception as e:
+            return failed({"last_update": "Unknown"}, e)
+
+    @staticmethod
+    def iter_installed_drivers():
+        """Driver records, yielded as PowerShell writes them."""
+        for drv in stream_powershell("installed_drivers"):
+            if drv:  # Check if the dictionary is not None
+                yield {
+                    "name": drv.get("DeviceName", "Unknown"),
+                    "version": drv.get("DriverVersion", "Unknown"),
+                    "manufacturer": drv.get("Manufacturer", "Unknown"),
+                    "release_date": drv.get("DriverDate", "Unknown"),
+                    "device_class": drv.get("DeviceClass", "Unknown"),
+                    "provider": drv.get("DriverProviderName", "Unknown"),
+                    "inf_name": drv.get("InfName", "Unknown"),
+                    "hardware_id": drv.get("HardwareID", ["Unknown"])[0] if drv.get("HardwareID") else "Unknown",
+                    "is_signed": drv.get("IsSigned", False),
+                    "digital_signer": drv.get("DigitalSigner", "Unknown"),
+                    "oem_inf": drv.get("OEMINF", "Unknown")
+                }
+
+    @staticmethod
+    def get_installed_drivers():
+        """Fetch detailed information about installed drivers."""
+        try:
+            drivers = list(SoftwareInfo.iter_installed_drivers())
+            return drivers if drivers else failed({"error": "No driver information found."})
+
+        except Exception as e:
+            return failed({"error": str(e)}, e)
@@ -0,0 +1,32 @@
+import json
+import psutil
+import eventlog
+from collectors import failed
+from collectors.queries import run_powershell
+
+
+class UserInfo:
+    @staticmethod
+    def get_current_user():
+        """Fetch the currently logged-in user in the most efficient way."""
+        users = psutil.users()
+        return users[0].name if users else "Unknown"
+
+    @staticmethod
+    def get_login_history():
+        """Logons (event 4624) not yet delivered to the schedule."""
+        try:
+            return eventlog.default_reader.read("login_history")
+        except Exception as e:
+            return failed([], e)
+    
+    @staticmethod
+    def get_bitlocker_status():
+        try:
+            output = run_powershell("bitlocker_status")
+            data = json.loads(output)
+            if isinstance(data, dict):
+                data = [data]
+            return {vol["MountPoint"]: "Encrypted" if vol["ProtectionStatus"] == 1 else "Not Encrypted" for vol in data}
+        except Exception as e:
+            return failed({"Unknown": "Unknown"}, e)
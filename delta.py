@@ -0,0 +1,193 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+FULL_RESYNC_INTERVAL = 24 * 3600  # seconds between unconditional full reports
+MAX_SNAPSHOTS = 20000  # (device, schedule) snapshots the server keeps; the least recently used go first
+
+# List sections whose items have a stable identity, so changed items can be sent on their own.
+# Other list sections are diffed by item content: changed items show up as removed + added.
+ITEM_KEYS = {
+    "running_processes": "pid",
+    "peripheral_devices": "id",
+    "login_history": "record_id",
+    "security_events": "record_id",
+}
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def item_fingerprint(item):
+    return hashlib.sha1(_canonical(item)).hexdigest()
+
+
+def fingerprint(value):
+    """Content hash of a section. Lists hash as a multiset so item order doesn't matter."""
+    if isinstance(value, list):
+        value = sorted(item_fingerprint(item) for item in value)
+    return hashlib.sha1(_canonical(value)).hexdigest()
+
+
+def _index(section, items):
+    """Map item identity -> item, or None when the items can't be told apart."""
+    field = ITEM_KEYS.get(section)
+    index = {}
+    for item in items:
+        if field is not None:
+            if not isinstance(item, dict) or field not in item:
+                return None
+            key = item[field]
+        else:
+            key = item_fingerprint(item)
+        if key in index:
+            return None
+        index[key] = item
+    return index
+
+
+def diff_list(section, old, new):
+    """Item-level diff of a list section, or None if sending it whole is simpler."""
+    old_index, new_index = _index(section, old), _index(section, new)
+    if old_index is None or new_index is None:
+        return None
+
+    added = [item for key, item in new_index.items() if key not in old_index]
+    removed = [key for key in old_index if key not in new_index]
+    modified = []
+    if section in ITEM_KEYS:
+        modified = [item for key, item in new_index.items() if key in old_index and item != old_index[key]]
+
+    if len(added) + len(removed) + len(modified) > len(new) // 2:
+        return None
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def patch_list(section, old, patch):
+    field = ITEM_KEYS.get(section)
+    key = (lambda item: item[field]) if field else item_fingerprint
+    removed = set(patch["removed"])
+    modified = {item[field]: item for item in patch["modified"]} if field else {}
+
+    items = [modified.get(key(item), item) for item in old if key(item) not in removed]
+    return items + patch["added"]
+
+
+def make_delta(base, current):
+    """Describe current relative to base: whole changed sections, list patches and dropped sections."""
+    sections, patches = {}, {}
+    for section, value in current.items():
+        if section in base and fingerprint(base[section]) == fingerprint(value):
+            continue
+        patch = None
+        if isinstance(value, list) and isinstance(base.get(section), list):
+            patch = diff_list(section, base[section], value)
+        if patch is None:
+            sections[section] = value
+        else:
+            patches[section] = patch
+
+    return {
+        "sections": sections,
+        "patches": patches,
+        "removed": [section for section in base if section not in current],
+        "fingerprints": {section: fingerprint(value) for section, value in current.items()},
+    }
+
+
+def apply_delta(base, delta):
+    """Rebuild the full snapshot; raises ValueError if it doesn't match what the agent had."""
+    snapshot = {section: value for section, value in base.items() if section not in delta["removed"]}
+    snapshot.update(delta["sections"])
+    for section, patch in delta["patches"].items():
+        snapshot[section] = patch_list(section, base.get(section, []), patch)
+
+    if set(snapshot) != set(delta["fingerprints"]):
+        raise ValueError("Snapshot sections don't match the report")
+    for section, expected in delta["fingerprints"].items():
+        if fingerprint(snapshot[section]) != expected:
+            raise ValueError(f"Fingerprint mismatch for section {section}")
+    return snapshot
+
+
+class DeltaReporter:
+    """Agent side: turns each schedule's collected data into a full or delta report."""
+
+    def __init__(self, resync_interval=FULL_RESYNC_INTERVAL, clock=time.time):
+        self.resync_interval = resync_interval
+        self.clock = clock
+        self.acked = {}  # schedule -> {"seq", "data", "full_at"} of the last acknowledged report
+        self.next_seq = {}
+        self.pending = {}
+
+    def build(self, schedule, data):
+        seq = self.next_seq.get(schedule, 0) + 1
+        self.next_seq[schedule] = seq
+        base = self.acked.get(schedule)
+
+        if base is None or self.clock() - base["full_at"] >= self.resync_interval:
+            report = {"schedule": schedule, "seq": seq, "type": "full", "data": data}
+            full_at = self.clock()
+        else:
+            report = {"schedule": schedule, "seq": seq, "type": "delta", "base_seq": base["seq"],
+                      **make_delta(base["data"], data)}
+            full_at = base["full_at"]
+
+        self.pending[schedule] = {"seq": seq, "data": data, "full_at": full_at}
+        return report
+
+    def acknowledge(self, schedule, ack):
+        """Apply the server's answer to the last report built for the schedule."""
+        pending = self.pending.pop(schedule, None)
+        if not isinstance(ack, dict) or pending is None:
+            return
+        if ack.get("status") == "resync":
+            self.resync(schedule)
+        elif ack.get("status") == "ok" and ack.get("seq") == pending["seq"]:
+            self.acked[schedule] = pending
+
+    def resync(self, schedule=None):
+        """Make the next report of the schedule (or of every schedule) a full one."""
+        if schedule is None:
+            self.acked.clear()
+        else:
+            self.acked.pop(schedule, None)
+
+
+class SnapshotStore:
+    """Server side: keeps the latest full snapshot per device and schedule to rebuild deltas against.
+
+    At most max_snapshots are kept. A delta against an evicted snapshot gets a resync ack, so the
+    agent sends its next report in full; for a device that reports rarely that costs one full report.
+    """
+
+    def __init__(self, max_snapshots=MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+        self.lock = threading.Lock()
+
+    def receive(self, device, report):
+        """Returns (snapshot, ack). snapshot is None when the agent has to resend a full report."""
+        key = (device, report.get("schedule"))
+
+        if report.get("type", "full") == "full":
+            snapshot = report["data"]
+        else:
+            with self.lock:
+                base = self.snapshots.get(key)
+            if base is None or base["seq"] != report.get("base_seq"):
+                return None, {"status": "resync"}
+            try:
+                snapshot = apply_delta(base["data"], report)
+            except (KeyError, TypeError, ValueError):
+                return None, {"status": "resync"}
+
+        with self.lock:
+            self.snapshots[key] = {"seq": report.get("seq"), "data": snapshot}
+            self.snapshots.move_to_end(key)
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return snapshot, {"status": "ok", "seq": report.get("seq")}
@@ -0,0 +1,86 @@
+import threading
+import time
+import uuid
+
+DEFAULT_DEADLINE = 30  # seconds /api/custom waits for answers
+MAX_DEADLINE = 300
+RESULT_TTL = 600  # seconds a finished request's results stay available for polling
+
+
+def device_room(serial_number):
+    return f"device:{serial_number}"
+
+
+def group_room(group):
+    return f"group:{group}"
+
+
+class Gather:
+    """Answers to one request sent to a set of devices."""
+
+    def __init__(self, request_id, expected, clock=time.monotonic):
+        self.request_id = request_id
+        self.expected = set(expected)
+        self.results = {}
+        self.created = clock()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        if not self.expected:
+            self.done.set()
+
+    def add(self, serial_number, data):
+        with self.lock:
+            self.results[serial_number] = data
+            if self.expected <= self.results.keys():
+                self.done.set()
+
+    def wait(self, deadline):
+        self.done.wait(deadline)
+        return self.snapshot()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "request_id": self.request_id,
+                "complete": self.done.is_set(),
+                "results": dict(self.results),
+                "missing": sorted(self.expected - self.results.keys()),
+            }
+
+
+class Dispatcher:
+    """Tracks outstanding requests by id so each device's answer reaches the right caller."""
+
+    def __init__(self, clock=time.monotonic, ttl=RESULT_TTL):
+        self.clock = clock
+        self.ttl = ttl
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def start(self, expected):
+        """Open a request expecting answers from the given serial numbers."""
+        gather = Gather(uuid.uuid4().hex, expected, self.clock)
+        with self.lock:
+            self._expire()
+            self.requests[gather.request_id] = gather
+        return gather
+
+    def get(self, request_id):
+        with self.lock:
+            return self.requests.get(request_id)
+
+    def receive(self, request_id, serial_number, data):
+        """Record a device's answer. Returns False for unknown or expired request ids."""
+        gather = self.get(request_id)
+        if gather is None:
+            return False
+        gather.add(serial_number, data)
+        return True
+
+    def _expire(self):
+        cutoff = self.clock() - self.ttl
+        for request_id in [rid for rid, gather in self.requests.items() if gather.created < cutoff]:
+            del self.requests[request_id]
+
+
+default_dispatcher = Dispatcher()
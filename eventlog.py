@@ -0,0 +1,168 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import powershell
+
+MAIN_DIR = "C:/ProgramData/TrackIt"
+BOOKMARK_FILE = os.path.join(MAIN_DIR, "eventlog_bookmarks.json")
+
+BATCH_SIZE = 200  # events reported per collection at most; the rest follow in later collections
+QUERY_TIMEOUT = 60  # seconds
+
+# Consumers the collection in progress reads events for; None outside a scheduled collection
+_consumers = contextvars.ContextVar("eventlog_consumers", default=None)
+
+# Source name -> (log, event ids, extra fields read from the event's properties by index)
+SOURCES = {
+    "login_history": ("Security", (4624,), {"user": 5, "domain": 6, "logon_type": 8}),
+    "security_events": ("Security", (1102, 4625, 4720, 4726, 4732, 4740), {}),
+}
+
+
+def build_query(source, after=None, batch_size=BATCH_SIZE):
+    """PowerShell printing the log's newest RecordId, then up to batch_size matching events, one JSON object per line.
+
+    The event ids and the RecordId bound are part of the XPath filter, so the event log service
+    skips everything else. With a bookmark the oldest newer events come first, so a backlog is
+    worked through in order; without one, the newest batch_size are read.
+    """
+    log, event_ids, fields = SOURCES[source]
+    condition = " or ".join(f"EventID={event_id}" for event_id in event_ids)
+    xpath = f"*[System[({condition})" + (f" and EventRecordID>{int(after)}" if after is not None else "") + "]]"
+    properties = "".join(f"; {name} = $_.Properties[{index}].Value" for name, index in fields.items())
+    return "\n".join([
+        f"$newest = Get-WinEvent -LogName '{log}' -MaxEvents 1 -ErrorAction SilentlyContinue",
+        "@{ newest = $newest.RecordId } | ConvertTo-Json -Compress",
+        f"Get-WinEvent -LogName '{log}' -FilterXPath '{xpath}' -MaxEvents {int(batch_size)}"
+        + (" -Oldest" if after is not None else "") + " -ErrorAction SilentlyContinue |",
+        "    ForEach-Object { [pscustomobject]@{ record_id = $_.RecordId; event_id = $_.Id; "
+        f"time = $_.TimeCreated.ToUniversalTime().ToString('o'){properties} }} | ConvertTo-Json -Compress }}",
+    ])
+
+
+class EventLogReader:
+    """Tails event logs for several consumers (schedules), each with its own bookmark per source:
+    the last RecordId delivered to it. Bookmarks are kept on disk.
+
+    read() doesn't move bookmarks. It returns the events past the oldest bookmark of the consumers
+    collecting (see consumers()), at most batch_size of them; unseen() cuts them down to what one
+    consumer hasn't had yet, and acknowledge() moves its bookmarks once the server has them or they
+    are spooled. Events lost to a timeout or a failed send are read again next time. Without
+    consumers (e.g. an ad-hoc request) read() returns the newest events.
+
+    A log that was cleared (its newest RecordId is now below a bookmark) is read again from its newest events.
+    """
+
+    def __init__(self, path=BOOKMARK_FILE, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.bookmarks = None  # consumer -> source -> RecordId
+        self.floors = None  # source -> RecordId up to which nothing matched, for consumers without a bookmark
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.bookmarks is not None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self.bookmarks, self.floors = dict(state["consumers"]), dict(state["floors"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.bookmarks, self.floors = {}, {}
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"consumers": self.bookmarks, "floors": self.floors}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save event log bookmarks: {e}")
+
+    def read(self, source):
+        """New events for the source, oldest first: {"record_id", "event_id", "time", ...}."""
+        names = _consumers.get()
+        with self.lock:
+            self._load()
+            return self._read(source, names)
+
+    def _start(self, source, names):
+        if names is None:
+            return None
+        marks = [self.bookmarks[name][source] for name in names if source in self.bookmarks.get(name, {})]
+        if not marks:
+            return self.floors.get(source)
+        return max(min(marks), self.floors.get(source, min(marks)))
+
+    def _read(self, source, names):
+        after = self._start(source, names)
+        newest, events = None, []
+        for line in powershell.stream(build_query(source, after, self.batch_size), timeout=QUERY_TIMEOUT):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "newest" in record:
+                newest = record["newest"]
+            else:
+                events.append(record)
+
+        if after is not None and newest is not None and newest < after:
+            logging.info(f"{SOURCES[source][0]} log was cleared, reading {source} from its newest events")
+            self.floors.pop(source, None)
+            for marks in self.bookmarks.values():
+                if marks.get(source, 0) > newest:
+                    del marks[source]
+            self.save()
+            return self._read(source, names)
+
+        events.sort(key=lambda event: event["record_id"])
+        if not events and newest is not None and source not in self.floors and after is None:
+            # Nothing matched yet: start from here rather than rescanning the whole log next time
+            self.floors[source] = newest
+            self.save()
+        if len(events) >= self.batch_size:
+            logging.info(f"{source}: {self.batch_size} events read, newer ones follow in the next collection")
+        return events
+
+    def unseen(self, consumer, data):
+        """data (collector name -> value) with each event source cut down to the events past the consumer's bookmarks."""
+        with self.lock:
+            self._load()
+            marks = self.bookmarks.get(consumer, {})
+            return {
+                name: [event for event in value if event["record_id"] > marks[name]]
+                if name in SOURCES and name in marks and isinstance(value, list) else value
+                for name, value in data.items()
+            }
+
+    def acknowledge(self, consumer, data):
+        """Move the consumer's bookmarks past the events in data, once they are delivered or spooled."""
+        with self.lock:
+            self._load()
+            marks = self.bookmarks.setdefault(consumer, {})
+            moved = False
+            for name, value in data.items():
+                if name not in SOURCES or not isinstance(value, list) or not value:
+                    continue
+                last = max(event["record_id"] for event in value)
+                if last > marks.get(name, -1):
+                    marks[name] = last
+                    moved = True
+            if moved:
+                self.save()
+
+
+@contextlib.contextmanager
+def consumers(*names):
+    """Read events for these consumers (schedule ids) in the block; see EventLogReader."""
+    token = _consumers.set(names)
+    try:
+        yield
+    finally:
+        _consumers.reset(token)
+
+
+default_reader = EventLogReader()
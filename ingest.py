@@ -0,0 +1,140 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import storage
+import timeseries
+
+MAX_QUEUE = 10000  # reports waiting to be written; producers get IngestBusy beyond this
+BATCH_SIZE = 500  # reports written per transaction at most
+BATCH_WAIT = 0.05  # seconds the writer waits for more reports before committing a partial batch
+ENQUEUE_TIMEOUT = 1  # seconds a request waits for room in a full queue
+COMMIT_TIMEOUT = 30  # seconds an ack-after-commit request waits for its batch
+
+# "enqueue": acknowledge once the report is queued (fastest; a crash can lose what is queued)
+# "commit": acknowledge once the batch holding the report is committed
+DURABILITY = "enqueue"
+
+
+class IngestBusy(Exception):
+    """The queue is full; the sender should retry later."""
+
+
+class IngestQueue:
+    """Bounded queue in front of the report store, drained by one writer thread.
+
+    The writer takes whatever has queued up (up to batch_size) and stores it in one
+    transaction, so a burst of reports costs one commit instead of one per report.
+    """
+
+    def __init__(self, store=storage.default_store, sinks=(), max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 batch_wait=BATCH_WAIT, durability=DURABILITY):
+        self.store = store
+        self.sinks = list(sinks)  # also given each committed batch, e.g. the metric store
+        self.queue = queue.Queue(max_queue)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.durability = durability
+        self.thread = None
+        self.lock = threading.Lock()
+        self.commit_times = deque(maxlen=1000)  # seconds per recent commit
+        self.counters = {"enqueued": 0, "committed": 0, "batches": 0, "rejected": 0, "failed": 0}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self.thread.start()
+        return self
+
+    def submit(self, serial_number, report, wait=None):
+        """Queue a report for storage. With wait (default: durability == "commit"), block until it is committed."""
+        self.start()
+        future = Future()
+        try:
+            self.queue.put((serial_number, report, future), timeout=ENQUEUE_TIMEOUT)
+        except queue.Full:
+            self._count("rejected")
+            raise IngestBusy(f"Ingest queue full ({self.queue.maxsize} reports)")
+        self._count("enqueued")
+
+        if wait if wait is not None else self.durability == "commit":
+            future.result(COMMIT_TIMEOUT)
+        return future
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # flush() markers carry no report; they resolve once everything queued before them is committed
+            markers = [future for serial_number, _, future in batch if serial_number is None]
+            batch = [entry for entry in batch if entry[0] is not None]
+            self._commit(batch)
+            for future in markers:
+                future.set_result(None)
+
+    def _commit(self, batch):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            ids = self.store.append_many([(serial_number, report) for serial_number, report, _ in batch])
+        except Exception as e:
+            logging.error(f"Failed to store {len(batch)} reports: {e}")
+            self._count("failed", len(batch))
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.commit_times.append(elapsed)
+            self.counters["committed"] += len(batch)
+            self.counters["batches"] += 1
+        for (_, _, future), report_id in zip(batch, ids):
+            future.set_result(report_id)
+
+        for sink in self.sinks:
+            try:
+                sink.append_many([(serial_number, report) for serial_number, report, _ in batch])
+            except Exception as e:
+                logging.error(f"{type(sink).__name__} failed on {len(batch)} reports: {e}")
+
+    def flush(self, timeout=COMMIT_TIMEOUT):
+        """Wait until everything queued so far is committed."""
+        self.start()
+        future = Future()
+        self.queue.put((None, None, future), timeout=timeout)
+        future.result(timeout)
+
+    def stats(self):
+        with self.lock:
+            commit_times = sorted(self.commit_times)
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "durability": self.durability,
+            "commit_ms_avg": round(sum(commit_times) / len(commit_times) * 1000, 3) if commit_times else None,
+            "commit_ms_p99": round(commit_times[int(len(commit_times) * 0.99)] * 1000, 3) if commit_times else None,
+        }
+
+
+default_queue = IngestQueue(sinks=[timeseries.default_store])
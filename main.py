@@ -1,8 +1,14 @@
+import asyncio
 import scheduler
-import time
+import sampler
+import registry
+import spool
+import schema
+import wire
 import socketio
-import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from get_info import DEFAULT_WORKERS, collect_info_async
 
 # Configure logging
 logging.basicConfig(
@@ -12,59 +18,128 @@ logging.basicConfig(
 )
 
 MAIN_DIR = "C:/ProgramData/TrackIt"
+AVAILABLE_METHODS_FILE = f"{MAIN_DIR}/available_methods.json"
+SERVER_URL = "http://localhost:5000"
+CONNECT_GRACE = 5  # seconds the first scheduler run waits for the connection
+RECONNECT_DELAY = 10  # seconds between attempts while the server can't be reached
+REGISTER_TIMEOUT = 30
 
-sio = socketio.Client()
+sio = socketio.AsyncClient()
+connected = asyncio.Event()
+schedules_changed = asyncio.Event()
+background_tasks = set()
 
-def connect_to_server():
-    try:
-        logging.info("Attempting to connect to server...")
-        sio.connect("http://localhost:5000")
-        logging.info("Connected to server successfully.")
-        sio.wait()
-    except Exception as e:
-        logging.error(f"Failed to connect: {e}")
+async def connect_to_server():
+    while True:
+        try:
+            logging.info("Attempting to connect to server...")
+            await sio.connect(SERVER_URL)
+            logging.info("Connected to server successfully.")
+            # Returns once the client gives up reconnecting on its own
+            await sio.wait()
+        except Exception as e:
+            logging.error(f"Failed to connect: {e}")
+        await asyncio.sleep(RECONNECT_DELAY)
+
+def start_background_task(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 def log_event(event_name, data):
     logging.info(f"Received event: {event_name} | Data: {data}")
 
+@sio.event
+async def connect():
+    info, _ = await collect_info_async("serial_number")
+    serial_number = info["serial_number"]
+    ack = await sio.call("register", {
+        "serial_number": serial_number,
+        "capabilities": wire.capabilities(),
+        "schemas": list(schema.SUPPORTED)
+    }, timeout=REGISTER_TIMEOUT)
+    # Servers without format negotiation don't answer with one; keep sending plain JSON to them
+    ack = ack if isinstance(ack, dict) else {}
+    wire.negotiated = ack.get("format")
+    schema.negotiated = ack.get("schema", schema.LEGACY)
+    logging.info(f"Registered with server as {serial_number}, wire format: {wire.negotiated}, schema: {schema.negotiated}")
+    connected.set()
+    start_background_task(spool.replay(sio))
+
+@sio.on("request_resync")
+async def request_resync(data):
+    log_event("request_resync", data)
+    schedule_id = (data or {}).get("schedule_id")
+    scheduler.reporter.resync(None if schedule_id is None else str(schedule_id))
+
 @sio.on("create_schedule")
-def create_schedule(data):
+async def create_schedule(data):
     log_event("create_schedule", data)
-    
+
     schedule_id = data.get("schedule_id")
     interval = data.get("interval")
     details_required = data.get("details_required")
-    
+
     if all([schedule_id, interval, details_required]):
         scheduler.create_schedule(schedule_id, interval, details_required)
+        schedules_changed.set()
         logging.info(f"Schedule created: ID={schedule_id}, Interval={interval}, Details={details_required}")
     else:
         logging.warning("Invalid schedule data received")
 
-@sio.on("custom_data")
-def custom_event(data):
-    log_event("custom_data", data)
-    
+async def process_custom_data(data):
     details_required = data.get("details_required")
-    from get_info import get_info
-    
+
     try:
-        processed_result = get_info(*details_required)
-        sio.emit("processed_data", processed_result)
+        processed_result, _ = await collect_info_async(*details_required, refresh=data.get("refresh", False))
+        processed_result = schema.render(processed_result)
+        # Servers that gather answers tag the request; send the id back so ours reaches the right caller
+        if "request_id" in data:
+            await sio.emit("processed_data", wire.pack({"request_id": data["request_id"], "data": processed_result}))
+        else:
+            await sio.emit("processed_data", wire.pack(processed_result))
         logging.info(f"Processed and sent data: {processed_result}")
     except Exception as e:
         logging.error(f"Error processing data: {e}")
 
-if __name__ == "__main__":
-    logging.info("Starting client...")
-    thread = threading.Thread(target=connect_to_server, daemon=True)
-    thread.start()
-    time.sleep(5)
+@sio.on("custom_data")
+async def custom_event(data):
+    log_event("custom_data", data)
+    # Run as its own task so the socket keeps handling events while the collectors run
+    start_background_task(process_custom_data(data))
 
+async def run_schedules():
+    """Run due schedules, then sleep until the next one is due or the schedules change."""
     while True:
+        schedules_changed.clear()
         try:
-            scheduler.run_scheduler(sio.connected)
+            await scheduler.run_scheduler(sio)
             logging.info("Scheduler ran successfully.")
         except Exception as e:
             logging.error(f"Scheduler error: {e}")
-        time.sleep(5)
+
+        try:
+            await asyncio.wait_for(schedules_changed.wait(), scheduler.seconds_until_due())
+        except asyncio.TimeoutError:
+            pass
+
+async def main():
+    logging.info("Starting client...")
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(DEFAULT_WORKERS, thread_name_prefix="collector"))
+    sampler.default_sampler.start()
+    try:
+        registry.write_available_methods(AVAILABLE_METHODS_FILE)
+    except OSError as e:
+        logging.error(f"Could not write available methods: {e}")
+
+    connection = asyncio.create_task(connect_to_server())
+    # Start as soon as we're connected rather than after a fixed delay; run offline if that takes too long
+    try:
+        await asyncio.wait_for(connected.wait(), CONNECT_GRACE)
+    except asyncio.TimeoutError:
+        pass
+
+    await asyncio.gather(connection, run_schedules())
+
+if __name__ == "__main__":
+    asyncio.run(main())
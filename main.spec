@@ -6,7 +6,15 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=[
+        'collectors.hardware',
+        'collectors.software',
+        'collectors.network',
+        'collectors.security',
+        'collectors.user',
+        'collectors.other',
+        'collectors.probes',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,165 @@
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+
+# TRACKIT_METRICS=0 (or set_enabled(False)) turns every hook into a no-op
+ENABLED = os.environ.get("TRACKIT_METRICS", "1") != "0"
+
+# Upper bounds of the histogram buckets
+SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES = tuple(256 * 4**i for i in range(9))  # 256 B .. 16 MB
+
+PREFIX = "trackit_"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+
+histograms = {}  # (name, labels) -> Histogram
+counters = {}  # (name, labels) -> number
+gauges = {}  # name -> function returning {labels: value}
+_lock = threading.Lock()
+
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = enabled
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, buckets=SECONDS, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    histogram = histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = histograms.setdefault(key, Histogram(buckets))
+    histogram.observe(value)
+
+
+def increment(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        counters[key] = counters.get(key, 0) + amount
+
+
+def gauge(name, function):
+    """Register a gauge read when metrics are rendered; function returns a number or {labels tuple: number}."""
+    gauges[name] = function
+
+
+@contextlib.contextmanager
+def _timer(name, labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timer(name, **labels):
+    """Context manager observing how long its block takes, in seconds."""
+    return _timer(name, labels) if ENABLED else contextlib.nullcontext()
+
+
+def timed(name, **labels):
+    """Decorator form of timer()."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def render():
+    """Everything recorded so far in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        histogram_items = sorted(histograms.items())
+        counter_items = sorted(counters.items())
+
+    seen = set()
+    for (name, labels), histogram in histogram_items:
+        if name not in seen:
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            seen.add(name)
+        with histogram.lock:
+            counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+        cumulative = 0
+        for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], counts):
+            cumulative += bucket_count
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+
+    for (name, labels), value in counter_items:
+        if name not in seen:
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            seen.add(name)
+        lines.append(f"{PREFIX}{name}_total{_labels(labels)} {value}")
+
+    for name, function in sorted(gauges.items()):
+        try:
+            values = function()
+        except Exception:
+            continue
+        lines.append(f"# TYPE {PREFIX}{name} gauge")
+        for labels, value in (values.items() if isinstance(values, dict) else [((), values)]):
+            if value is not None:
+                lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """Compact summary for the agent to attach to its reports:
+    {"name{label=value}": [count, sum, max]} for histograms and {"name{...}": total} for counters."""
+    summary = {}
+    with _lock:
+        histogram_items = list(histograms.items())
+        counter_items = list(counters.items())
+    for (name, labels), histogram in histogram_items:
+        with histogram.lock:
+            summary[f"{name}{_labels(labels)}"] = [histogram.count, round(histogram.sum, 6), round(histogram.max, 6)]
+    for (name, labels), value in counter_items:
+        summary[f"{name}{_labels(labels)}"] = value
+    return summary
+
+
+def reset():
+    with _lock:
+        histograms.clear()
+        counters.clear()
@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import subprocess
+import threading
+import metrics
+
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+_active_batch = contextvars.ContextVar("powershell_batch", default=None)
+
+
+def default_runner(args, check=True, timeout=None):
+    """Run a command and return its stdout as text."""
+    if check:
+        return subprocess.check_output(args, text=True, timeout=timeout, creationflags=CREATE_NO_WINDOW)
+    return subprocess.run(args, capture_output=True, text=True, timeout=timeout, creationflags=CREATE_NO_WINDOW).stdout
+
+
+async def default_async_runner(args, check=True, timeout=None):
+    """Like default_runner, but spawns the process without blocking the event loop."""
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, creationflags=CREATE_NO_WINDOW
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(args, timeout)
+
+    # Same newline handling as text mode in subprocess
+    output = stdout.decode(errors="replace").replace("\r\n", "\n")
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, output)
+    return output
+
+
+def default_stream_runner(args, timeout=None):
+    """Run a command and yield its stdout line by line as the process writes it."""
+    process = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, creationflags=CREATE_NO_WINDOW
+    )
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, expire) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        yield from process.stdout
+    finally:
+        # Also reached when the consumer stops early: don't leave PowerShell running
+        if timer:
+            timer.cancel()
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(args, timeout)
+
+
+# Swapped out with set_command_runner() to feed canned output on machines without PowerShell
+command_runner = default_runner
+async_command_runner = default_async_runner
+stream_runner = default_stream_runner
+
+
+def set_command_runner(runner, async_runner=None, streaming_runner=None):
+    """Replace the functions used to spawn PowerShell; returns the previous sync runner.
+
+    Without an async_runner, async callers run the given sync runner in a worker thread; without
+    a streaming_runner, streamed output is the sync runner's output split into lines.
+    """
+    global command_runner, async_command_runner, stream_runner
+    previous, command_runner = command_runner, runner or default_runner
+    if async_runner is None and runner is not None:
+        async def async_runner(args, **kwargs):
+            return await asyncio.to_thread(runner, args, **kwargs)
+    if streaming_runner is None and runner is not None:
+        def streaming_runner(args, timeout=None):
+            return iter(runner(args, check=False, timeout=timeout).splitlines())
+    async_command_runner = async_runner or default_async_runner
+    stream_runner = streaming_runner or default_stream_runner
+    return previous
+
+
+def run(command, check=True, timeout=None):
+    with metrics.timer("powershell_seconds"):
+        return command_runner(["powershell", "-Command", command], check=check, timeout=timeout)
+
+
+async def run_async(command, check=True, timeout=None):
+    with metrics.timer("powershell_seconds"):
+        return await async_command_runner(["powershell", "-Command", command], check=check, timeout=timeout)
+
+
+def stream(command, timeout=None):
+    """Yield the command's output lines as PowerShell writes them, rather than all at once at exit."""
+    with metrics.timer("powershell_seconds"):
+        yield from stream_runner(["powershell", "-Command", command], timeout=timeout)
+
+
+def build_script(queries):
+    """Wrap each named query so one PowerShell process returns all outputs as a JSON object."""
+    lines = ["$ErrorActionPreference = 'Stop'", "$results = @{}"]
+    for name, command in queries.items():
+        lines.append(f"try {{ $results['{name}'] = (& {{ {command.strip()} }} | Out-String) }} catch {{ }}")
+    lines.append("$results | ConvertTo-Json -Compress")
+    return "\n".join(lines)
+
+
+def _parse_batch(queries, output):
+    results = json.loads(output) if output.strip() else {}
+    if not isinstance(results, dict):
+        return {}
+
+    # Out-String keeps PowerShell's CRLF endings; match what text-mode subprocess output gives the parsers
+    return {name: results[name].replace("\r\n", "\n") for name in queries if isinstance(results.get(name), str)}
+
+
+def run_batch(queries, timeout=None):
+    """Run all queries in a single PowerShell call. Queries that failed are left out of the result."""
+    if not queries:
+        return {}
+
+    try:
+        return _parse_batch(queries, run(build_script(queries), timeout=timeout))
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logging.warning(f"Batched PowerShell call failed, falling back to individual calls: {e}")
+        return {}
+
+
+async def run_batch_async(queries, timeout=None):
+    if not queries:
+        return {}
+
+    try:
+        return _parse_batch(queries, await run_async(build_script(queries), timeout=timeout))
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logging.warning(f"Batched PowerShell call failed, falling back to individual calls: {e}")
+        return {}
+
+
+@contextlib.contextmanager
+def batch(queries, timeout=None):
+    """Pre-run the queries once; lookup() serves their outputs until the block exits."""
+    token = _active_batch.set(run_batch(queries, timeout))
+    try:
+        yield _active_batch.get()
+    finally:
+        _active_batch.reset(token)
+
+
+@contextlib.asynccontextmanager
+async def batch_async(queries, timeout=None):
+    token = _active_batch.set(await run_batch_async(queries, timeout))
+    try:
+        yield _active_batch.get()
+    finally:
+        _active_batch.reset(token)
+
+
+def lookup(name, command, check=True):
+    """Return the batched output for name, or run the command on its own if the batch didn't cover it."""
+    outputs = _active_batch.get()
+    if outputs is not None and name in outputs:
+        return outputs[name]
+    return run(command, check=check)
+
+
+def lookup_lines(name, command, timeout=None):
+    """Like lookup(), but yields output lines, streaming them from PowerShell when not batched."""
+    outputs = _active_batch.get()
+    if outputs is not None and name in outputs:
+        return iter(outputs[name].splitlines())
+    return stream(command, timeout=timeout)
@@ -0,0 +1,188 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+import psutil
+
+# A process counts as changed when one of these moves by at least this much between snapshots
+CPU_CHANGE = 1.0  # percent
+RSS_CHANGE = 1024 * 1024  # bytes
+# running_processes, process_table and process_changes in one collection share a snapshot taken within
+# this many seconds; a second walk moments later would reset cpu_percent() to a near-zero interval
+SHARE_WINDOW = 5
+
+_consumers = contextvars.ContextVar("process_consumers", default=None)
+
+
+class ProcessTracker:
+    """Keeps psutil.Process objects between calls.
+
+    Reusing them gives cpu_percent() a previous sample to compare with, so it is meaningful
+    without sleeping, and attributes that don't change over a process' life (name, exe,
+    username) are only read once.
+
+    Process changes are kept per consumer (schedule), like the event log bookmarks: changes()
+    doesn't move baselines, unseen() works out each consumer's changes from the snapshot it was
+    collected with, and acknowledge() moves the consumer's baseline once they are delivered or
+    spooled. Without consumers (e.g. an ad-hoc request) changes() compares the latest two snapshots.
+    """
+
+    def __init__(self, share_window=SHARE_WINDOW, clock=time.monotonic):
+        self.processes = {}  # pid -> (psutil.Process, static attributes)
+        self.baselines = {}  # consumer -> {pid: record} as of the changes last delivered to it
+        self.collected = {}  # consumer -> {pid: record} of its collection in progress
+        self.share_window = share_window
+        self.clock = clock
+        self.last = None  # (time, records) of the latest snapshot
+        self.previous = []  # records of the snapshot before it
+        self.lock = threading.Lock()
+
+    def _track(self, pid):
+        tracked = self.processes.get(pid)
+        # is_running() also catches the pid having been reused by a new process
+        if tracked is not None and tracked[0].is_running():
+            return tracked
+
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            info = {
+                "name": _attribute(proc.name),
+                "exe": _attribute(proc.exe),
+                "username": _attribute(proc.username),
+            }
+            proc.cpu_percent(interval=None)
+        self.processes[pid] = (proc, info)
+        return self.processes[pid]
+
+    def snapshot(self):
+        """One record per running process: pid, name, exe, username, status, cpu_percent, rss.
+
+        A snapshot taken within share_window seconds is returned as is; callers must not modify it.
+        """
+        with self.lock:
+            if self.last is not None and self.clock() - self.last[0] <= self.share_window:
+                return self.last[1]
+            records = self._walk()
+            self.previous = self.last[1] if self.last is not None else []
+            self.last = (self.clock(), records)
+            return records
+
+    def _walk(self):
+        """Read every process; called with the lock held."""
+        records = []
+        pids = psutil.pids()
+        for pid in pids:
+            try:
+                proc, info = self._track(pid)
+                with proc.oneshot():
+                    records.append({
+                        "pid": pid,
+                        **info,
+                        "status": proc.status(),
+                        "cpu_percent": proc.cpu_percent(interval=None),
+                        "rss": proc.memory_info().rss,
+                    })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self.processes.pop(pid, None)
+
+        alive = set(pids)
+        for pid in [pid for pid in self.processes if pid not in alive]:
+            del self.processes[pid]
+        return records
+
+    def changes(self):
+        """New, exited and changed processes: {"new": [records], "exited": [pids], "changed": [records]}.
+
+        For the consumers collecting (see consumers()) this is relative to the first one's baseline;
+        unseen() gives each its own.
+        """
+        current = {record["pid"]: record for record in self.snapshot()}
+        names = _consumers.get()
+
+        with self.lock:
+            if names is None:
+                return _diff({record["pid"]: record for record in self.previous}, current)
+            for name in names:
+                self.collected[name] = current
+            return _diff(self.baselines.get(names[0], {}) if names else {}, current)
+
+    def unseen(self, consumer, data):
+        """data (collector name -> value) with process_changes relative to the consumer's baseline."""
+        with self.lock:
+            current = self.collected.pop(consumer, None)
+            if current is None or not isinstance(data.get("process_changes"), dict):
+                return data
+            return {**data, "process_changes": _diff(self.baselines.get(consumer, {}), current)}
+
+    def acknowledge(self, consumer, data):
+        """Move the consumer's baseline past the process changes in data, once they are delivered or spooled."""
+        changes = data.get("process_changes")
+        if not isinstance(changes, dict):
+            return
+        with self.lock:
+            baseline = dict(self.baselines.get(consumer, {}))
+            for pid in changes["exited"]:
+                baseline.pop(pid, None)
+            for record in changes["new"] + changes["changed"]:
+                baseline[record["pid"]] = record
+            self.baselines[consumer] = baseline
+
+
+@contextlib.contextmanager
+def consumers(*names):
+    """Collect process changes for these consumers (schedule ids) in the block; see ProcessTracker."""
+    token = _consumers.set(names)
+    try:
+        yield
+    finally:
+        _consumers.reset(token)
+
+
+def _attribute(getter):
+    try:
+        return getter()
+    except (psutil.AccessDenied, psutil.ZombieProcess):
+        return "N/A"
+
+
+def _diff(previous, current):
+    return {
+        "new": [record for pid, record in current.items() if pid not in previous],
+        "exited": [pid for pid in previous if pid not in current],
+        "changed": [record for pid, record in current.items() if pid in previous and _changed(previous[pid], record)],
+    }
+
+
+def _changed(old, new):
+    return (
+        old["status"] != new["status"]
+        or abs(old["cpu_percent"] - new["cpu_percent"]) >= CPU_CHANGE
+        or abs(old["rss"] - new["rss"]) >= RSS_CHANGE
+    )
+
+
+def columnar(records):
+    """Parallel arrays per field, with repeated strings replaced by indexes into a shared table."""
+    strings, string_index = [], {}
+
+    def intern(value):
+        value = str(value)
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    return {
+        "strings": strings,
+        "pid": [record["pid"] for record in records],
+        "name": [intern(record["name"]) for record in records],
+        "exe": [intern(record["exe"]) for record in records],
+        "username": [intern(record["username"]) for record in records],
+        "status": [intern(record["status"]) for record in records],
+        "cpu_percent": [record["cpu_percent"] for record in records],
+        "rss": [record["rss"] for record in records],
+    }
+
+
+default_tracker = ProcessTracker()
@@ -0,0 +1,131 @@
+import importlib
+import json
+import sys
+
+PLATFORM = "windows" if sys.platform == "win32" else sys.platform
+
+
+class Collector:
+    """A registered collector. Its implementation module is imported on first call."""
+
+    def __init__(self, name, category, target, cost="low", ttl="volatile", platform="windows", queries=(), probe=None):
+        self.name = name
+        self.category = category
+        self.target = target  # "module:Class.method"
+        self.cost = cost  # rough cost of a run: "low", "medium" or "high"
+        self.ttl = ttl  # TTL class, see cache.TTL_CLASSES
+        self.platform = platform  # "windows" or "any"
+        self.queries = queries  # names of the PowerShell queries it (and its probe) runs, see collectors.queries
+        self.probe = probe  # cheap check whose result changes when the collector's would, see collectors.probes
+        self.function = None
+
+    def load(self):
+        if self.function is None:
+            self.function = _resolve(self.target)
+        return self.function
+
+    def __call__(self):
+        return self.load()()
+
+    def run_probe(self):
+        """The probe's current reading. The probe can be a target string like the collector's, or a function."""
+        if isinstance(self.probe, str):
+            self.probe = _resolve(self.probe)
+        return self.probe()
+
+    def supported(self, platform=PLATFORM):
+        return self.platform in ("any", platform)
+
+    def metadata(self):
+        return {
+            "name": self.name,
+            "category": self.category,
+            "cost": self.cost,
+            "ttl": self.ttl,
+            "platform": self.platform,
+        }
+
+
+def _resolve(target):
+    module_name, attribute = target.split(":")
+    function = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        function = getattr(function, part)
+    return function
+
+
+collectors = {}
+
+
+def register(name, category, target, **metadata):
+    collectors[name] = Collector(name, category, target, **metadata)
+    return collectors[name]
+
+
+def set_probe(name, probe):
+    """Replace (or with None, remove) a collector's probe, e.g. with a fake in tests."""
+    collectors[name].probe = probe
+
+
+def get(name):
+    return collectors.get(name)
+
+
+def available(platform=PLATFORM):
+    """Names of the collectors that run on the platform, in registration order."""
+    return [name for name, collector in collectors.items() if collector.supported(platform)]
+
+
+def write_available_methods(path):
+    """Publish the collector names and metadata for the admin side."""
+    with open(path, "w") as f:
+        json.dump([collector.metadata() for collector in collectors.values()], f, indent=4)
+
+
+HARDWARE = "collectors.hardware:HardwareInfo"
+SOFTWARE = "collectors.software:SoftwareInfo"
+NETWORK = "collectors.network:NetworkInfo"
+SECURITY = "collectors.security:SecurityInfo"
+USER = "collectors.user:UserInfo"
+OTHER = "collectors.other:OtherInfo"
+PROBES = "collectors.probes"
+
+register("memory", "hardware", f"{HARDWARE}.get_memory_details", cost="medium", ttl="static", queries=("memory",))
+register("storage", "hardware", f"{HARDWARE}.get_storage_details", platform="any")
+register("serial_number", "hardware", f"{HARDWARE}.get_serial_number", cost="medium", ttl="static", queries=("serial_number",))
+register("motherboard", "hardware", f"{HARDWARE}.get_motherboard_details", cost="medium", ttl="static", queries=("motherboard",))
+register("monitor", "hardware", f"{HARDWARE}.get_monitor_details", cost="medium", ttl="slow", queries=("monitor",))
+register("cpu", "hardware", f"{HARDWARE}.get_cpu_details", cost="medium", queries=("cpu",))
+register("gpu", "hardware", f"{HARDWARE}.get_gpu_details", cost="high", ttl="static", queries=("gpu", "total_memory"))
+register("peripheral_devices", "hardware", f"{HARDWARE}.get_peripheral_devices", cost="high", ttl="slow",
+         queries=("peripheral_devices", "pnp_count"), probe=f"{PROBES}:peripheral_devices")
+
+register("os_install_date", "software", f"{SOFTWARE}.get_os_install_date", ttl="static")
+register("installed_software", "software", f"{SOFTWARE}.get_installed_software", cost="medium", ttl="slow",
+         probe=f"{PROBES}:installed_software")
+register("running_processes", "software", f"{SOFTWARE}.get_running_processes", cost="medium", platform="any")
+register("process_table", "software", f"{SOFTWARE}.get_process_table", cost="medium", platform="any")
+register("process_changes", "software", f"{SOFTWARE}.get_process_changes", cost="medium", platform="any")
+register("windows_update_status", "software", f"{SOFTWARE}.get_windows_update_status", cost="medium", ttl="slow", queries=("windows_update_status",))
+register("installed_drivers", "software", f"{SOFTWARE}.get_installed_drivers", cost="high", ttl="slow", queries=("installed_drivers",))
+
+register("network_adapters", "network", f"{NETWORK}.get_network_adapters", cost="medium", ttl="slow",
+         queries=("network_adapters",), probe=f"{PROBES}:network_adapters")
+register("public_ip", "network", f"{NETWORK}.get_public_ip", cost="medium", ttl="slow", platform="any")
+register("wifi_ssid", "network", f"{NETWORK}.get_wifi_ssid", cost="medium")
+register("vpn_status", "network", f"{NETWORK}.get_vpn_status", cost="medium", queries=("vpn_status",))
+
+register("antivirus", "security", f"{SECURITY}.get_antivirus_details", cost="medium", ttl="slow", queries=("antivirus",))
+register("firewall", "security", f"{SECURITY}.get_firewall_details", cost="medium", ttl="slow", queries=("firewall",))
+register("security_events", "security", f"{SECURITY}.get_security_events", cost="medium")
+
+register("current_user", "user", f"{USER}.get_current_user", platform="any")
+register("login_history", "user", f"{USER}.get_login_history", cost="medium")
+register("bitlocker_status", "user", f"{USER}.get_bitlocker_status", cost="medium", ttl="slow", queries=("bitlocker_status",))
+
+register("cpu_usage", "other", f"{OTHER}.get_cpu_usage", platform="any")
+register("memory_usage", "other", f"{OTHER}.get_memory_usage", platform="any")
+register("asset_tag", "other", f"{OTHER}.get_asset_tag", platform="any")
+register("last_boot_time", "other", f"{OTHER}.get_last_boot_time", platform="any")
+register("battery_status", "other", f"{OTHER}.get_battery_status", platform="any")
+register("windows_product_key", "other", f"{OTHER}.get_windows_product_key", cost="medium", ttl="static", queries=("windows_product_key",))
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+import psutil
+
+SAMPLE_INTERVAL = 2  # seconds between samples
+HISTORY = 300  # seconds of samples kept in the ring buffer
+REPORT_WINDOW = 60  # seconds averaged over by the collectors
+
+
+class Sampler(threading.Thread):
+    """Samples CPU usage and available memory in the background into a ring buffer.
+
+    Disk free space isn't sampled: the storage collector reads it live, and it moves too slowly
+    for a min/max over the report window to say anything.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, history=HISTORY, clock=time.monotonic):
+        super().__init__(name="sampler", daemon=True)
+        self.interval = interval
+        self.clock = clock
+        self.samples = deque(maxlen=max(1, int(history / interval)))
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.last_cpu_times = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _cpu_percent(self):
+        # Worked out from our own cpu_times() deltas so other psutil.cpu_percent() callers don't skew it
+        times = psutil.cpu_times()
+        last, self.last_cpu_times = self.last_cpu_times, times
+        if last is None:
+            return None
+        total = sum(times) - sum(last)
+        idle = times.idle - last.idle
+        return round(100 * (total - idle) / total, 1) if total > 0 else 0.0
+
+    def sample(self):
+        cpu = self._cpu_percent()
+        if cpu is None:
+            return
+
+        sample = {
+            "time": self.clock(),
+            "cpu": cpu,
+            "memory_available": psutil.virtual_memory().available,
+        }
+        with self.lock:
+            self.samples.append(sample)
+
+    def current(self):
+        """Latest sample, or None if nothing has been sampled yet."""
+        with self.lock:
+            return self.samples[-1] if self.samples else None
+
+    def stats(self, field, window=REPORT_WINDOW):
+        """min/max/avg of a field over the last window seconds."""
+        since = self.clock() - window
+        with self.lock:
+            samples = [s for s in self.samples if s["time"] >= since]
+
+        values = [s[field] for s in samples if s[field] is not None]
+        if not values:
+            return None
+
+        return {
+            "current": values[-1],
+            "min": min(values),
+            "max": max(values),
+            "avg": round(sum(values) / len(values), 1),
+            "samples": len(values),
+        }
+
+
+default_sampler = Sampler()
+
+
+def cpu_stats(window=REPORT_WINDOW):
+    """CPU usage over the window, from the background sampler when it is running.
+
+    Falls back to a single blocking one-second probe when there are no samples yet,
+    e.g. when collectors run outside the agent.
+    """
+    stats = default_sampler.stats("cpu", window)
+    if stats is None:
+        usage = psutil.cpu_percent(interval=1)
+        stats = {"current": usage, "min": usage, "max": usage, "avg": usage, "samples": 1}
+    return stats
+
+
+def memory_stats(window=REPORT_WINDOW):
+    """Available memory in bytes over the window, from the background sampler when it is running.
+
+    Falls back to a single reading when there are no samples yet.
+    """
+    stats = default_sampler.stats("memory_available", window)
+    if stats is None:
+        available = psutil.virtual_memory().available
+        stats = {"current": available, "min": available, "max": available, "avg": available, "samples": 1}
+    return stats
@@ -1,9 +1,18 @@
-import datetime
+import heapq
 import os
 import json
+import platform
 import time
-from get_info import get_info
-import socketio
+import zlib
+import eventlog
+import metrics
+import processes
+import registry
+import spool
+import schema
+import wire
+from get_info import collect_info_async
+from delta import DeltaReporter
 import logging
 
 # Configure logging
@@ -15,65 +24,227 @@ logging.basicConfig(
 
 PARENT_DIR = r"C:/ProgramData/TrackIt"
 SCHEDULES_DIR = os.path.join(PARENT_DIR, "schedules")
-DATA_DIR = os.path.join(PARENT_DIR, "data")
 LAST_SENT_FILE = os.path.join(PARENT_DIR, "last_sent.json")
 
 os.makedirs(SCHEDULES_DIR, exist_ok=True)
-os.makedirs(DATA_DIR, exist_ok=True)
 
-def run_scheduler(connected_to_server=True):
-    logging.info("Running scheduler...")
-    
-    if os.path.exists(LAST_SENT_FILE):
-        with open(LAST_SENT_FILE, "r") as f:
-            last_sent = json.load(f)
-    else:
-        last_sent = {}
+ACK_TIMEOUT = 30
+SEND_TELEMETRY = True  # attach the agent's metrics summary to scheduled reports
+COALESCE_WINDOW = 30  # seconds a schedule may run early to share a collection with one that is due
+ALIGN_PHASES = True
+# Per-agent offset of the aligned due times, so the fleet doesn't report all at once
+AGENT_PHASE = zlib.crc32(platform.node().encode()) % 60
 
-    schedules = os.listdir(SCHEDULES_DIR)
+reporter = DeltaReporter()
 
-    if not schedules:
-        logging.info("No schedules found.")
-        return
+def unseen(schedule_id, data):
+    """data cut down to the events and process changes the schedule hasn't been sent yet."""
+    return processes.default_tracker.unseen(schedule_id, eventlog.default_reader.unseen(schedule_id, data))
+
+def delivered(schedule_id, data):
+    """Move the schedule's event bookmarks and process baseline past data, once it is acked or spooled."""
+    eventlog.default_reader.acknowledge(schedule_id, data)
+    processes.default_tracker.acknowledge(schedule_id, data)
+
+async def send_reports(client, collected):
+    """Send the data of several schedules as full or delta reports in one message and record
+    the server's acknowledgement of each. collected maps schedule id -> data."""
+    reports = [reporter.build(schedule_id, schema.render(data)) for schedule_id, data in collected.items()]
+    try:
+        payload = {"reports": reports}
+        if SEND_TELEMETRY and metrics.ENABLED:
+            payload["telemetry"] = metrics.snapshot()
+        ack = await client.call("processed_data", wire.pack(payload), timeout=ACK_TIMEOUT)
+        acks = ack["acks"]
+    except Exception as e:
+        logging.warning(f"No acknowledgement for {list(collected)}: {e}")
+        acks = [None] * len(reports)
+
+    for report, ack in zip(reports, acks):
+        reporter.acknowledge(report["schedule"], ack)
+        # The server has the events and process changes now; otherwise they are sent again in the next report
+        if isinstance(ack, dict) and ack.get("status") == "ok":
+            delivered(report["schedule"], collected[report["schedule"]])
+        logging.info(f"Sent {report['type']} report for {report['schedule']}, ack: {ack}")
+
+class Scheduler:
+    """Keeps the schedules and their next due times in memory.
+
+    Schedule files are read once; after that create_schedule() keeps memory and disk in step.
+    Due times sit in a heap, so finding the next one doesn't touch the disk, and last_sent.json
+    is only rewritten (atomically) after a schedule has run.
+    """
+
+    def __init__(self, schedules_dir=SCHEDULES_DIR, state_file=LAST_SENT_FILE, clock=time.time,
+                 slack=COALESCE_WINDOW, align=ALIGN_PHASES, phase=AGENT_PHASE):
+        self.schedules_dir = schedules_dir
+        self.state_file = state_file
+        self.clock = clock
+        self.slack = slack
+        self.align = align
+        self.phase = phase
+        self.schedules = {}  # schedule file name -> {"interval", "details_required"}
+        self.last_sent = {}  # schedule file name -> {"last_sent", "interval"}, as stored in last_sent.json
+        self.due = {}  # schedule file name -> next due time
+        self.popped = {}  # schedule file name -> due time it had when pop_due() returned it
+        self.heap = []  # (due time, schedule file name); entries that no longer match self.due are skipped
+        self.loaded = False
+        self.dirty = False
 
-    for schedule_file_name in schedules:
-        if schedule_file_name.endswith(".json"):
-            if schedule_file_name not in last_sent:
-                with open(os.path.join(SCHEDULES_DIR, schedule_file_name), "r") as f:
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+
+        # A file torn by a crash mid-write is skipped, so it can't stop the other schedules from running
+        try:
+            with open(self.state_file, "r") as f:
+                last_sent = json.load(f)
+            self.last_sent = last_sent if isinstance(last_sent, dict) else {}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read {self.state_file}, treating every schedule as never sent: {e}")
+
+        try:
+            names = [name for name in os.listdir(self.schedules_dir) if name.endswith(".json")]
+        except OSError as e:
+            logging.error(f"Could not list schedules in {self.schedules_dir}: {e}")
+            names = []
+        for name in names:
+            try:
+                with open(os.path.join(self.schedules_dir, name), "r") as f:
                     schedule = json.load(f)
+                self._set(name, schedule)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.error(f"Skipping unreadable schedule {name}: {e}")
+
+    def _set(self, name, schedule):
+        sent = self.last_sent.get(name)
+        # A schedule that has never run is due straight away
+        due = sent["last_sent"] + schedule["interval"] if sent else self.clock()
+        self.schedules[name] = schedule
+        self._push(name, due)
+
+    def _push(self, name, due):
+        self.due[name] = due
+        heapq.heappush(self.heap, (due, name))
+
+    def update(self, name, schedule):
+        self.load()
+        self._set(name, schedule)
+
+    def next_due(self):
+        """Time the next schedule is due, or None without schedules."""
+        self.load()
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self):
+        """Names of the schedules due now, or within the slack window, so they can share one collection.
+
+        They aren't due again until mark_sent() is called.
+        """
+        if (due := self.next_due()) is None or due > self.clock():
+            return []
+
+        until, names = self.clock() + self.slack, []
+        while (due := self.next_due()) is not None and due <= until:
+            _, name = heapq.heappop(self.heap)
+            self.popped[name] = self.due.pop(name)
+            names.append(name)
+        return names
+
+    def mark_sent(self, name):
+        schedule = self.schedules[name]
+        now = self.clock()
+        # A schedule pulled forward counts as run at its due time, so it isn't due again moments later
+        due = self.popped.pop(name, now)
+        self.last_sent[name] = {"last_sent": now, "interval": schedule["interval"]}
+        self._push(name, self.next_run(max(now, due), schedule["interval"]))
+        self.dirty = True
+
+    def next_run(self, now, interval):
+        """Next due time after a run. Aligned to multiples of the interval (plus this agent's phase),
+        schedules whose intervals divide each other fall due together and can be coalesced.
+
+        A boundary less than half an interval away is skipped, so a schedule that first runs just
+        before one (e.g. right after being created) doesn't run again straight away.
+        """
+        if not self.align:
+            return now + interval
+        boundary = ((now - self.phase) // interval + 1) * interval + self.phase
+        return boundary + interval if boundary - now < interval / 2 else boundary
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.last_sent, f)
+        os.replace(temp_file, self.state_file)
+        self.dirty = False
+
+
+schedules = Scheduler()
+
+def seconds_until_due():
+    """Seconds until the next schedule is due (0 if one already is), or None without schedules."""
+    due = schedules.next_due()
+    return None if due is None else max(due - schedules.clock(), 0)
+
+def requested_details(details_required):
+    return registry.available() if "all" in details_required else details_required
+
+async def run_scheduler(client):
+    """Collect and send (or store, when offline) every schedule that is due.
+
+    Schedules due together are collected in one pass over the union of their details,
+    so a collector they share runs once.
+    """
+    with metrics.timer("scheduler_tick_seconds"):
+        await _run_scheduler(client)
+
+async def _run_scheduler(client):
+    due = schedules.pop_due()
+    if not due:
+        return
+
+    # Taken now: a create_schedule handled while collecting can change what a schedule asks for
+    requested = {name: requested_details(schedules.schedules[name]["details_required"]) for name in due}
+    details = list(dict.fromkeys(detail for name in due for detail in requested[name]))
+    logging.info(f"Running scheduler for {due}, collecting {details}")
+
+    collected = {}
+    try:
+        schedule_ids = [name[:-len(".json")] for name in due]
+        with eventlog.consumers(*schedule_ids), processes.consumers(*schedule_ids):
+            info, status = await collect_info_async(*details)
+        logging.info(f"Collector status: {status}")
+        for schedule_file_name in due:
+            schedule_id = schedule_file_name[:-len(".json")]
+            data = {detail: info[detail] for detail in requested[schedule_file_name]}
+            collected[schedule_id] = unseen(schedule_id, data)
+    except Exception as e:
+        logging.error(f"Collection for {due} failed: {e}")
+    finally:
+        # Also after a failure, so a broken schedule waits its interval instead of retrying in a tight loop
+        for schedule_file_name in due:
+            schedules.mark_sent(schedule_file_name)
+
+    try:
+        if collected and client.connected:
+            await send_reports(client, collected)
+        elif collected:
+            for schedule_id, data in collected.items():
+                spool.default_spool.append(schedule_id, data)
+                delivered(schedule_id, data)
+            logging.info(f"Spooled data locally for {list(collected)}")
+    except Exception as e:
+        logging.error(f"Sending reports for {due} failed: {e}")
 
-                data = get_info(*schedule["details_required"])
-                logging.info(f"Collected data for {schedule_file_name}: {data}")
-
-                if connected_to_server:
-                    socketio.emit("processed_data", {"data": data})
-                    logging.info(f"Sent data to server for {schedule_file_name}")
-                else:
-                    with open(os.path.join(DATA_DIR, schedule_file_name), "w") as f:
-                        json.dump(data, f, indent=4)
-                    logging.info(f"Saved data locally for {schedule_file_name}")
-
-                last_sent[schedule_file_name] = {"last_sent": time.time(), "interval": schedule["interval"]}
-            else:
-                if time.time() - last_sent[schedule_file_name]["last_sent"] > last_sent[schedule_file_name]["interval"]:
-                    with open(os.path.join(SCHEDULES_DIR, schedule_file_name), "r") as f:
-                        schedule = json.load(f)
-
-                    data = get_info(*schedule["details_required"])
-                    logging.info(f"Collected data for {schedule_file_name}: {data}")
-
-                    if connected_to_server:
-                        socketio.emit("processed_data", {"data": data})
-                        logging.info(f"Sent data to server for {schedule_file_name}")
-                    else:
-                        with open(os.path.join(DATA_DIR, schedule_file_name), "w") as f:
-                            json.dump(data, f, indent=4)
-                        logging.info(f"Saved data locally for {schedule_file_name}")
-
-                    last_sent[schedule_file_name]["last_sent"] = time.time()
-
-    with open(LAST_SENT_FILE, "w") as f:
-        json.dump(last_sent, f)
+    schedules.save()
     logging.info("Scheduler execution completed.")
 
 def create_schedule(schedule_id, interval, details_required):
@@ -87,6 +258,7 @@ def create_schedule(schedule_id, interval, details_required):
     
     with open(filepath, "w") as f:
         json.dump(schedule, f, indent=4)
+    schedules.update(filename, schedule)
     
     logging.info(f"Schedule created: ID={schedule_id}, Interval={interval}, Details={details_required}")
     print(f"Schedule created and saved to {filepath}")
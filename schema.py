@@ -0,0 +1,179 @@
+"""Versions of the report data shape.
+
+Collectors produce version 2 ("raw"): quantities are numbers in base units (bytes, Hz, percent
+as a float) and unknown values are None. Version 1 ("legacy") is the original shape with display
+strings like "15.89 GB" and "Unknown"; render() produces it for servers that haven't negotiated
+raw data, and for display.
+"""
+import math
+import re
+
+LEGACY = 1
+RAW = 2
+VERSION = RAW  # what the collectors produce
+SUPPORTED = (RAW, LEGACY)  # best first
+
+# What the agent sends; stays legacy unless the server agreed on something newer at register
+negotiated = LEGACY
+
+
+def negotiate(offered):
+    """Highest version both sides support, from the other side's SUPPORTED list."""
+    return max((version for version in offered if version in SUPPORTED), default=LEGACY)
+
+
+UNITS = {
+    "b": 1, "kb": 1024, "mb": 1024**2, "gb": 1024**3, "tb": 1024**4,
+    "hz": 1, "khz": 1e3, "mhz": 1e6, "ghz": 1e9,
+    "%": 1,
+}
+QUANTITY = re.compile(r"^\s*(-?[\d.]+)\s*([a-zA-Z%]*)\s*$")
+
+
+def parse_quantity(value):
+    """Base-unit number from a raw number or a display string like "15.89 GB", "3200 MHz" or "12.0%"."""
+    if isinstance(value, bool):
+        return float("nan")
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = QUANTITY.match(str(value))
+    unit = match.group(2).lower() if match else None
+    if unit is None or (unit and unit not in UNITS):
+        return float("nan")
+    try:
+        return float(match.group(1)) * UNITS.get(unit, 1)
+    except ValueError:
+        return float("nan")
+
+
+def total_quantity(items, key):
+    """Sum of a quantity over dicts such as memory modules or disks, or None when none of them has it."""
+    values = [parse_quantity(item.get(key)) for item in items if isinstance(item, dict)]
+    values = [value for value in values if not math.isnan(value)]
+    return sum(values) if values else None
+
+
+def cpu_usage_percent(usage):
+    """CPU usage from the cpu_usage collector, averaged over its window when it has one."""
+    if isinstance(usage, dict):
+        usage = usage.get("cpu_usage_avg", usage.get("cpu_usage_percent"))
+    return parse_quantity(usage)
+
+
+def disk_free_percent(disks):
+    """Free space over all disks from the storage collector, as a percentage of their total size."""
+    total, free = total_quantity(disks.values(), "total"), total_quantity(disks.values(), "free")
+    return free / total * 100 if total and free is not None else None
+
+
+def format_bytes(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return "Unknown" if value is None else value
+    return f"{value / 1024**3:.2f} GB"
+
+
+def format_hz(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return "Unknown" if value is None else value
+    return f"{value / 1e6:g} MHz"
+
+
+def format_percent(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return "Unknown" if value is None else value
+    return f"{value}%"
+
+
+def _memory(modules):
+    return [
+        {**module, "size": format_bytes(module.get("size")), "speed": format_hz(module.get("speed")),
+         "manufacturer": module.get("manufacturer") or "Unknown"}
+        for module in modules
+    ]
+
+
+def _storage(disks):
+    return {
+        device: {"total": format_bytes(usage.get("total")), "free": format_bytes(usage.get("free"))}
+        for device, usage in disks.items()
+    }
+
+
+def _cpu(cpus):
+    return [
+        {**cpu, "name": cpu.get("name") or "Unknown", "speed": format_hz(cpu.get("speed")), "usage": format_percent(cpu.get("usage"))}
+        for cpu in cpus
+    ]
+
+
+def _gpu(gpus):
+    legacy = []
+    for gpu in gpus:
+        ram = gpu.get("ram")
+        if gpu.get("shared") and isinstance(ram, (int, float)):
+            ram = f"Shared ({ram / 1024**3:.2f} GB)"
+        elif isinstance(ram, (int, float)):
+            ram = f"{round(ram / 1024**3, 2)} GB"
+        legacy.append({"name": gpu.get("name") or "Unknown", "ram": "Unknown" if ram is None else ram})
+    return legacy
+
+
+def _network_adapters(adapters):
+    if not isinstance(adapters, list):
+        return adapters  # {"error": ...}
+    return [
+        {**{key: value for key, value in adapter.items() if key != "speed"},
+         "speed_mbps": int(adapter["speed"]) // 1_000_000 if isinstance(adapter["speed"], (int, float)) and adapter["speed"] else "Unknown"}
+        if "speed" in adapter else adapter
+        for adapter in adapters
+    ]
+
+
+def _running_processes(processes):
+    return [
+        {**{key: value for key, value in process.items() if key != "rss"}, "memory": process["rss"] // (1024 * 1024)}
+        if "rss" in process else process
+        for process in processes
+    ]
+
+
+def _battery_status(battery):
+    if "secsleft" not in battery or battery["secsleft"] is not None:
+        return battery
+    # psutil's POWER_TIME_UNLIMITED while plugged in, POWER_TIME_UNKNOWN (-1) otherwise
+    return {**battery, "secsleft": "Unlimited" if battery.get("power_plugged") else -1}
+
+
+def _login_history(events):
+    return [event["time"] if isinstance(event, dict) else event for event in events]
+
+
+# collector -> raw value to legacy value; collectors not listed have the same shape in both
+LEGACY_FORMATTERS = {
+    "memory": _memory,
+    "storage": _storage,
+    "cpu": _cpu,
+    "gpu": _gpu,
+    "network_adapters": _network_adapters,
+    "running_processes": _running_processes,
+    "battery_status": _battery_status,
+    "login_history": _login_history,
+}
+
+
+def render(data, version=None):
+    """Collected data ({collector: value}) in the given version, by default the negotiated one.
+
+    Values that are already display strings pass through, so data collected before the switch
+    to raw values (e.g. still in the spool) renders the same.
+    """
+    if (negotiated if version is None else version) >= RAW:
+        return data
+    rendered = {}
+    for name, value in data.items():
+        formatter = LEGACY_FORMATTERS.get(name)
+        try:
+            rendered[name] = value if formatter is None else formatter(value)
+        except (AttributeError, TypeError):
+            rendered[name] = value
+    return rendered
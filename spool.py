@@ -0,0 +1,195 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+import schema
+import wire
+
+MAIN_DIR = "C:/ProgramData/TrackIt"
+SPOOL_DIR = os.path.join(MAIN_DIR, "spool")
+
+SEGMENT_SIZE = 1024 * 1024  # bytes before a new segment is started
+MAX_SPOOL_SIZE = 50 * 1024 * 1024  # oldest segments are dropped beyond this
+MAX_AGE = 7 * 24 * 3600  # seconds; older segments are dropped
+COMPRESS = True
+
+REPLAY_BATCH = 50  # reports per replay message
+REPLAY_RATE = 20  # reports per second while draining
+REPLAY_JITTER = 30  # seconds; random delay before draining so reconnecting agents spread out
+ACK_TIMEOUT = 30
+
+
+class Spool:
+    """Append-only, size- and age-bounded store of reports made while offline.
+
+    Reports are appended as JSON lines to segment files named after their first record id.
+    cursor.json holds the id of the last report the server acknowledged; segments wholly
+    at or below it are deleted.
+    """
+
+    def __init__(self, directory=SPOOL_DIR, segment_size=SEGMENT_SIZE, max_size=MAX_SPOOL_SIZE,
+                 max_age=MAX_AGE, compress=COMPRESS, clock=time.time):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.compress = compress
+        self.clock = clock
+        self.cursor_file = os.path.join(directory, "cursor.json")
+        self.lock = threading.Lock()
+        self.next_id = None
+        self.torn = False  # the last segment didn't read cleanly; the next append starts a new one
+
+    def _segments(self):
+        """(first id, path) of each segment, oldest first."""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-"):
+                segments.append((int(name.split("-")[1].split(".")[0]), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    @staticmethod
+    def _open(path, mode):
+        # Appending to a gzip file adds a new member; gzip.open reads them back as one stream
+        return gzip.open(path, mode + "t") if path.endswith(".gz") else open(path, mode)
+
+    def _scan(self, path):
+        """(records, clean): the records up to the first torn one, and whether the segment read to its end."""
+        records = []
+        try:
+            with self._open(path, "r") as f:
+                for line in f:
+                    # A write cut short by a crash leaves a last line without its newline
+                    if not line.endswith("\n"):
+                        return records, False
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        return records, False
+        except (OSError, EOFError, zlib.error):  # includes gzip.BadGzipFile and truncated gzip members
+            return records, False
+        return records, True
+
+    def _read(self, path):
+        return self._scan(path)[0]
+
+    def _load(self):
+        if self.next_id is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self._segments()
+        records, clean = self._scan(segments[-1][1]) if segments else ([], True)
+        self.next_id = max(
+            records[-1]["id"] + 1 if records else 1,
+            self.cursor() + 1,
+            # Past a torn segment's own name, so the new segment doesn't append to it
+            segments[-1][0] + (0 if clean else 1) if segments else 1,
+        )
+        if not clean:
+            logging.warning(f"Spool segment {segments[-1][1]} ends in a torn record, starting a new segment")
+            self.torn = True
+
+    def cursor(self):
+        try:
+            with open(self.cursor_file, "r") as f:
+                return json.load(f)["acknowledged"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def append(self, schedule, data):
+        with self.lock:
+            self._load()
+            segments = self._segments()
+            if not segments or self.torn or os.path.getsize(segments[-1][1]) >= self.segment_size:
+                self.torn = False
+                path = os.path.join(self.directory, f"segment-{self.next_id:012d}.jsonl" + (".gz" if self.compress else ""))
+            else:
+                path = segments[-1][1]
+
+            record = {"id": self.next_id, "schedule": schedule, "time": self.clock(), "data": data}
+            with self._open(path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            self.next_id += 1
+            self._enforce_bounds()
+
+    def _enforce_bounds(self):
+        segments = self._segments()
+        total = sum(os.path.getsize(path) for _, path in segments)
+        now = self.clock()
+        # Never drop the segment being written to
+        for _, path in segments[:-1]:
+            too_old = now - os.path.getmtime(path) > self.max_age
+            if total <= self.max_size and not too_old:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+            logging.warning(f"Dropped spool segment {path} to stay within bounds")
+
+    def pending(self, limit):
+        """Up to limit unacknowledged reports, oldest first."""
+        with self.lock:
+            self._load()
+            cursor, batch = self.cursor(), []
+            segments = self._segments()
+            for index, (first_id, path) in enumerate(segments):
+                # Skip segments that end at or before the cursor
+                if index + 1 < len(segments) and segments[index + 1][0] <= cursor + 1:
+                    continue
+                for record in self._read(path):
+                    if record["id"] > cursor:
+                        batch.append(record)
+                        if len(batch) >= limit:
+                            return batch
+            return batch
+
+    def acknowledge(self, last_id):
+        """Record that the server has everything up to last_id and drop segments it covers."""
+        with self.lock:
+            if last_id <= self.cursor():
+                return
+            temp_file = f"{self.cursor_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump({"acknowledged": last_id}, f)
+            os.replace(temp_file, self.cursor_file)
+
+            segments = self._segments()
+            for index, (_, path) in enumerate(segments[:-1]):
+                if segments[index + 1][0] <= last_id + 1:
+                    os.remove(path)
+
+
+default_spool = Spool()
+
+
+async def replay(client, spool=default_spool, batch_size=REPLAY_BATCH, rate=REPLAY_RATE, jitter=REPLAY_JITTER):
+    """Drain the spool to the server in acknowledged batches, at most rate reports per second."""
+    await asyncio.sleep(random.uniform(0, jitter))
+
+    while client.connected:
+        batch = await asyncio.to_thread(spool.pending, batch_size)
+        if not batch:
+            return
+        # The spool holds data as collected; send it in the shape this server asked for
+        reports = [{**record, "data": schema.render(record["data"])} for record in batch]
+
+        started = time.monotonic()
+        try:
+            ack = await client.call("spooled_data", wire.pack({"reports": reports}), timeout=ACK_TIMEOUT)
+        except Exception as e:
+            logging.warning(f"Spool replay interrupted: {e}")
+            return
+
+        if not isinstance(ack, dict) or ack.get("status") != "ok":
+            logging.warning(f"Spool replay rejected: {ack}")
+            return
+
+        await asyncio.to_thread(spool.acknowledge, ack["last_id"])
+        logging.info(f"Replayed {len(batch)} spooled reports up to id {ack['last_id']}")
+
+        # Pace the batches so the drain stays under the rate limit
+        await asyncio.sleep(max(len(batch) / rate - (time.monotonic() - started), 0))
@@ -0,0 +1,290 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import metrics
+
+DATA_DIR = "devices"
+DATABASE_FILE = os.path.join(DATA_DIR, "reports.db")
+
+BUSY_TIMEOUT = 30  # seconds a connection waits for another writer before giving up
+MAX_HISTORY = None  # reports kept per device by compact(); None keeps everything
+# Seconds of history kept by compact(); None keeps everything. Reports also hold inventory (software,
+# hardware changes) the time series doesn't, so age-based retention is left to deployments to opt into.
+MAX_AGE = None
+# Seconds full reports keep their volatile sections; compact() strips them after that, as the time series
+# keeps those metrics as rollups. This is what bounds growth per device while inventory history is kept.
+VOLATILE_MAX_AGE = 7 * 24 * 3600
+VOLATILE_COLLECTORS = ("cpu_usage", "memory_usage", "battery_status", "running_processes", "process_table", "process_changes")
+TRIM_BATCH = 500  # reports rewritten per transaction when stripping volatile sections
+COMPACT_INTERVAL = 3600  # seconds between compactions run by the backend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    serial_number TEXT NOT NULL,
+    schedule TEXT,
+    timestamp REAL NOT NULL,
+    spooled INTEGER NOT NULL DEFAULT 0,
+    trimmed INTEGER NOT NULL DEFAULT 0,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_device_time ON reports (serial_number, timestamp);
+CREATE TABLE IF NOT EXISTS latest (
+    serial_number TEXT NOT NULL,
+    collector TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    report_id INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (serial_number, collector)
+);
+"""
+
+# Keep the newest value; a spooled report from last week mustn't overwrite today's
+UPSERT_LATEST = """
+INSERT INTO latest (serial_number, collector, timestamp, report_id, value) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (serial_number, collector) DO UPDATE SET
+    timestamp = excluded.timestamp, report_id = excluded.report_id, value = excluded.value
+WHERE excluded.timestamp >= latest.timestamp
+"""
+
+
+def _encode(data):
+    return zlib.compress(json.dumps(data, separators=(",", ":"), default=str).encode())
+
+
+def _decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def trim_volatile(data):
+    """Report data without its volatile sections: the VOLATILE_COLLECTORS, and free space in storage."""
+    if not isinstance(data, dict):
+        return data
+    trimmed = {name: value for name, value in data.items() if name not in VOLATILE_COLLECTORS}
+    if isinstance(trimmed.get("storage"), dict):
+        trimmed["storage"] = {
+            disk: {key: value for key, value in usage.items() if key != "free"} if isinstance(usage, dict) else usage
+            for disk, usage in trimmed["storage"].items()
+        }
+    return trimmed
+
+
+def epoch_seconds(value):
+    """Epoch seconds from an epoch number or an ISO timestamp string."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class ReportStore:
+    """Append-only report history in SQLite, indexed by device and time.
+
+    Each report is one row, so appending costs the same whatever the device's history length.
+    The database runs in WAL mode: readers don't block the writer, and writes from several
+    request threads are serialised by a lock instead of racing on a shared file.
+    """
+
+    def __init__(self, path=DATABASE_FILE, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+
+    def connection(self):
+        """This thread's connection; SQLite connections can't be shared between threads."""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.executescript(SCHEMA)
+            # Databases created before reports could be trimmed
+            if "trimmed" not in [row[1] for row in db.execute("PRAGMA table_info(reports)")]:
+                with self.write_lock, db:
+                    db.execute("ALTER TABLE reports ADD COLUMN trimmed INTEGER NOT NULL DEFAULT 0")
+            self.local.db = db
+        return db
+
+    def append(self, serial_number, report):
+        """Store one report: {"schedule", "data", "timestamp", optional "spooled"}. Returns its id."""
+        return self.append_many([(serial_number, report)])[-1]
+
+    def append_many(self, reports):
+        """Store (serial_number, report) pairs in one transaction. Returns their ids in order."""
+        db = self.connection()
+        rows = [
+            (
+                serial_number,
+                None if report.get("schedule") is None else str(report["schedule"]),
+                epoch_seconds(report.get("timestamp", self.clock())),
+                int(bool(report.get("spooled"))),
+                _encode(report["data"]),
+                report["data"],
+            )
+            for serial_number, report in reports
+        ]
+        ids = []
+        with metrics.timer("storage_write_seconds", store="reports"), self.write_lock, db:
+            for serial_number, schedule, timestamp, spooled, blob, data in rows:
+                report_id = db.execute(
+                    "INSERT INTO reports (serial_number, schedule, timestamp, spooled, data) VALUES (?, ?, ?, ?, ?)",
+                    (serial_number, schedule, timestamp, spooled, blob),
+                ).lastrowid
+                ids.append(report_id)
+                if isinstance(data, dict):
+                    db.executemany(UPSERT_LATEST, [
+                        (serial_number, collector, timestamp, report_id, _encode(value))
+                        for collector, value in data.items()
+                    ])
+        return ids
+
+    def latest(self, serial_number, collectors=None):
+        """Current value of each collector for a device: {collector: {"value", "timestamp", "report_id"}}."""
+        query = "SELECT collector, timestamp, report_id, value FROM latest WHERE serial_number = ?"
+        params = [serial_number]
+        if collectors:
+            query += f" AND collector IN ({', '.join('?' * len(collectors))})"
+            params.extend(collectors)
+        return {
+            row[0]: {
+                "value": _decode(row[3]),
+                "timestamp": datetime.fromtimestamp(row[1]).isoformat(),
+                "report_id": row[2],
+            }
+            for row in self.connection().execute(query, params)
+        }
+
+    def iter_latest(self, collectors=None):
+        """(serial_number, collector, value) for every device's latest values."""
+        query = "SELECT serial_number, collector, value FROM latest"
+        params = []
+        if collectors:
+            query += f" WHERE collector IN ({', '.join('?' * len(collectors))})"
+            params.extend(collectors)
+        for serial_number, collector, value in self.connection().execute(query, params):
+            yield serial_number, collector, _decode(value)
+
+    def history(self, serial_number, since=None, until=None, limit=None, collectors=None):
+        """Reports for a device between since and until (epoch seconds), oldest first.
+
+        With collectors, each report's data only holds those collectors and reports without any are skipped.
+        Reports older than VOLATILE_MAX_AGE no longer hold their volatile sections, see trim().
+        """
+        query = "SELECT id, schedule, timestamp, spooled, data FROM reports WHERE serial_number = ?"
+        params = [serial_number]
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND timestamp < ?"
+            params.append(until)
+        query += " ORDER BY timestamp, id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        reports = []
+        for row in self.connection().execute(query, params):
+            data = _decode(row[4])
+            if collectors:
+                data = {name: data[name] for name in collectors if name in data}
+                if not data:
+                    continue
+            reports.append({
+                "id": row[0],
+                "schedule": row[1],
+                "timestamp": datetime.fromtimestamp(row[2]).isoformat(),
+                "spooled": bool(row[3]),
+                "data": data,
+            })
+        return reports
+
+    def count(self, serial_number=None):
+        if serial_number is None:
+            return self.connection().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM reports WHERE serial_number = ?", (serial_number,)
+        ).fetchone()[0]
+
+    def devices(self):
+        """Known devices with the time they last reported, from the latest-state table."""
+        return [
+            {"serial_number": row[0], "last_seen": datetime.fromtimestamp(row[1]).isoformat(), "collectors": row[2]}
+            for row in self.connection().execute(
+                "SELECT serial_number, MAX(timestamp), COUNT(*) FROM latest GROUP BY serial_number ORDER BY serial_number"
+            )
+        ]
+
+    def trim(self, max_age=VOLATILE_MAX_AGE, batch_size=TRIM_BATCH):
+        """Strip the volatile sections from reports older than max_age. Returns how many were rewritten."""
+        db = self.connection()
+        cutoff, trimmed = self.clock() - max_age, 0
+        while True:
+            # In batches, so the ingest writer isn't held up for the whole backlog
+            with self.write_lock, db:
+                rows = db.execute(
+                    "SELECT id, data FROM reports WHERE trimmed = 0 AND timestamp < ? LIMIT ?", (cutoff, batch_size)
+                ).fetchall()
+                db.executemany(
+                    "UPDATE reports SET data = ?, trimmed = 1 WHERE id = ?",
+                    [(_encode(trim_volatile(_decode(blob))), report_id) for report_id, blob in rows],
+                )
+            trimmed += len(rows)
+            if len(rows) < batch_size:
+                return trimmed
+
+    def compact(self, max_history=MAX_HISTORY, max_age=MAX_AGE, volatile_max_age=VOLATILE_MAX_AGE):
+        """Drop reports beyond the retention limits, strip the volatile sections from older ones
+        and give the freed pages back to the filesystem."""
+        db = self.connection()
+        removed = 0
+        trimmed = self.trim(volatile_max_age) if volatile_max_age is not None else 0
+        with self.write_lock:
+            with db:
+                if max_age is not None:
+                    removed += db.execute("DELETE FROM reports WHERE timestamp < ?", (self.clock() - max_age,)).rowcount
+                if max_history is not None:
+                    removed += db.execute(
+                        """DELETE FROM reports WHERE id IN (
+                            SELECT id FROM (
+                                SELECT id, ROW_NUMBER() OVER (PARTITION BY serial_number ORDER BY timestamp DESC, id DESC) AS age
+                                FROM reports
+                            ) WHERE age > ?
+                        )""",
+                        (max_history,),
+                    ).rowcount
+            db.execute("PRAGMA incremental_vacuum")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if removed or trimmed:
+            logging.info(f"Compacted report store: removed {removed} reports, trimmed {trimmed}")
+        return removed
+
+    def import_legacy(self, directory=DATA_DIR):
+        """Move the old devices/<serial>.json history files into the store, renaming each when done."""
+        imported = 0
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            serial_number = os.path.splitext(os.path.basename(path))[0]
+            try:
+                with open(path, "r") as f:
+                    reports = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"Could not import {path}: {e}")
+                continue
+            self.append_many([(serial_number, report) for report in reports if "data" in report])
+            os.replace(path, f"{path}.imported")
+            imported += len(reports)
+        return imported
+
+
+default_store = ReportStore()
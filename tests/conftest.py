@@ -0,0 +1,29 @@
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The agent modules log to, and create directories under, C:/ProgramData/TrackIt when imported.
+# Off Windows that path is relative, so point it at a scratch directory and log to stderr instead.
+os.chdir(tempfile.mkdtemp(prefix="trackit-tests-"))
+os.makedirs("C:/ProgramData/TrackIt", exist_ok=True)
+logging.basicConfig(level=logging.INFO)
+
+
+class Clock:
+    """Stands in for the clock= parameters; tests move it by setting now."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
@@ -0,0 +1,32 @@
+from delta import DeltaReporter, SnapshotStore
+
+
+def send(reporter, store, device, data):
+    report = reporter.build("1", data)
+    snapshot, ack = store.receive(device, report)
+    reporter.acknowledge("1", ack)
+    return report["type"], snapshot, ack
+
+
+def test_delta_rebuilds_the_full_snapshot():
+    reporter, store = DeltaReporter(), SnapshotStore()
+    send(reporter, store, "a", {"storage": {"C:": {"free": 1}}, "asset_tag": "x"})
+
+    kind, snapshot, ack = send(reporter, store, "a", {"storage": {"C:": {"free": 2}}, "asset_tag": "x"})
+    assert kind == "delta"
+    assert ack["status"] == "ok"
+    assert snapshot == {"storage": {"C:": {"free": 2}}, "asset_tag": "x"}
+
+
+def test_least_recently_used_snapshots_are_evicted():
+    store = SnapshotStore(max_snapshots=2)
+    reporters = {device: DeltaReporter() for device in "abc"}
+    for device in "abc":
+        send(reporters[device], store, device, {"asset_tag": device})
+
+    assert len(store.snapshots) == 2
+    # The evicted device's delta is refused, and its agent falls back to a full report
+    kind, snapshot, ack = send(reporters["a"], store, "a", {"asset_tag": "changed"})
+    assert (kind, snapshot, ack) == ("delta", None, {"status": "resync"})
+    kind, snapshot, ack = send(reporters["a"], store, "a", {"asset_tag": "changed"})
+    assert (kind, ack["status"]) == ("full", "ok")
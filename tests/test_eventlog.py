@@ -0,0 +1,103 @@
+import json
+import re
+
+import pytest
+
+import eventlog
+
+
+class FakeLog:
+    """Security log whose Get-WinEvent output follows the RecordId bound and -MaxEvents of the query."""
+
+    def __init__(self):
+        self.events = []
+
+    def add(self, count, event_id=4624):
+        start = self.events[-1]["record_id"] + 1 if self.events else 1
+        self.events += [{"record_id": start + i, "event_id": event_id, "time": "2026-01-01T00:00:00Z"} for i in range(count)]
+
+    def stream(self, script, timeout=None):
+        after = re.search(r"EventRecordID>(\d+)", script)
+        limit = int(re.search(r"-FilterXPath .* -MaxEvents (\d+)", script).group(1))
+        matching = [event for event in self.events if not after or event["record_id"] > int(after.group(1))]
+        matching = matching[:limit] if after else matching[-limit:]
+        newest = self.events[-1]["record_id"] if self.events else None
+        return [json.dumps({"newest": newest})] + [json.dumps(event) for event in matching]
+
+
+@pytest.fixture
+def log(monkeypatch):
+    fake = FakeLog()
+    monkeypatch.setattr(eventlog.powershell, "stream", fake.stream)
+    return fake
+
+
+@pytest.fixture
+def reader(tmp_path):
+    return eventlog.EventLogReader(str(tmp_path / "bookmarks.json"), batch_size=5)
+
+
+def collect(reader, *names):
+    """What a scheduled collection for these consumers delivers to each: consumer -> record ids."""
+    with eventlog.consumers(*names):
+        events = reader.read("login_history")
+    return {name: [event["record_id"] for event in reader.unseen(name, {"login_history": events})["login_history"]]
+            for name in names}
+
+
+def deliver(reader, name, record_ids):
+    reader.acknowledge(name, {"login_history": [{"record_id": record_id} for record_id in record_ids]})
+
+
+def test_each_consumer_gets_the_events_once(log, reader):
+    log.add(3)
+    first = collect(reader, "hourly")
+    assert first == {"hourly": [1, 2, 3]}
+    deliver(reader, "hourly", first["hourly"])
+
+    log.add(3)
+    both = collect(reader, "hourly", "daily")
+    # A schedule without bookmarks starts from the others' position
+    assert both == {"hourly": [4, 5, 6], "daily": [4, 5, 6]}
+    deliver(reader, "daily", both["daily"])
+
+    log.add(1)
+    # hourly's send failed, so it gets its events again; daily only what is new to it
+    assert collect(reader, "hourly", "daily") == {"hourly": [4, 5, 6, 7], "daily": [7]}
+
+
+def test_events_not_acknowledged_are_read_again(log, reader):
+    log.add(3)
+    assert collect(reader, "hourly") == {"hourly": [1, 2, 3]}
+    # The send failed or the collector timed out: nothing was acknowledged
+    log.add(1)
+    assert collect(reader, "hourly") == {"hourly": [1, 2, 3, 4]}
+
+
+def test_bookmarks_survive_a_restart(log, reader, tmp_path):
+    log.add(3)
+    deliver(reader, "hourly", collect(reader, "hourly")["hourly"])
+    log.add(1)
+
+    restarted = eventlog.EventLogReader(reader.path, batch_size=5)
+    assert collect(restarted, "hourly") == {"hourly": [4]}
+
+
+def test_ad_hoc_reads_leave_bookmarks_alone(log, reader):
+    log.add(8)
+    first = collect(reader, "hourly")
+    assert first == {"hourly": [4, 5, 6, 7, 8]}
+    deliver(reader, "hourly", first["hourly"])
+    log.add(3)
+
+    assert [event["record_id"] for event in reader.read("login_history")] == [7, 8, 9, 10, 11]
+    assert collect(reader, "hourly") == {"hourly": [9, 10, 11]}
+
+
+def test_cleared_log_is_read_from_its_newest_events(log, reader):
+    log.add(6)
+    deliver(reader, "hourly", collect(reader, "hourly")["hourly"])
+
+    log.events = []
+    log.add(2)
+    assert collect(reader, "hourly") == {"hourly": [1, 2]}
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import get_info
+import registry
+from collectors import failed
+from cache import PROBE_MAX_AGE, TTL_CLASSES, CollectorCache
+
+
+def fake_collector(name, function):
+    collector = registry.Collector(name, "test", "tests:unused", platform="any")
+    collector.function = function
+    return collector
+
+
+@pytest.fixture
+def collectors(monkeypatch):
+    def install(**functions):
+        for name, function in functions.items():
+            monkeypatch.setitem(get_info.available_methods, name, fake_collector(name, function))
+    return install
+
+
+def collect_async(*args, workers, **options):
+    async def run():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(workers))
+        return await get_info.collect_info_async(*args, batch=False, cache=None, **options)
+    return asyncio.run(run())
+
+
+def test_async_timeout_counts_from_when_the_collector_starts(collectors):
+    collectors(slow=lambda: time.sleep(0.6) or "slow", fast=lambda: "fast")
+
+    info, status = collect_async("slow", "fast", workers=1, timeout=0.5)
+
+    assert info["fast"] == "fast"
+    assert status["fast"]["status"] == "ok"
+    assert status["slow"]["status"] == "timeout"
+
+
+def test_async_collectors_still_queued_at_the_deadline_time_out(collectors):
+    ran = []
+    collectors(slow=lambda: time.sleep(0.5) or "slow", queued=lambda: ran.append(True) or "queued")
+
+    info, status = collect_async("slow", "queued", workers=1, timeout=5, deadline=0.2)
+
+    assert status["queued"] == {"status": "timeout", "elapsed": 0.0}
+    assert not ran
+
+
+def test_unchanged_result_is_collected_again_past_its_maximum_age(collectors, tmp_path):
+    now = [1_000_000.0]
+    cache = CollectorCache(str(tmp_path / "cache.json"), clock=lambda: now[0])
+    runs = []
+    collectors(software=lambda: runs.append(now[0]) or ["app"])
+    get_info.available_methods["software"].ttl = "slow"
+    get_info.available_methods["software"].probe = lambda: "same"
+
+    def collect():
+        return get_info.collect_info("software", batch=False, workers=0, cache=cache)[1]["software"]
+
+    assert collect()["status"] == "ok"
+    now[0] += TTL_CLASSES["slow"] + 1
+    status = collect()
+    assert status["status"] == "unchanged"
+    assert status["age"] == TTL_CLASSES["slow"] + 1
+    # Reuse doesn't make the result look newer than it is
+    assert cache.entries["software"]["time"] == 1_000_000.0
+
+    now[0] = 1_000_000.0 + TTL_CLASSES["slow"] * PROBE_MAX_AGE
+    assert collect()["status"] == "ok"
+    assert runs == [1_000_000.0, now[0]]
+
+
+def test_failed_results_are_reported_but_not_cached(collectors, tmp_path):
+    cache = CollectorCache(str(tmp_path / "cache.json"))
+    outputs = ["", "SN1"]
+
+    def serial_number():
+        output = outputs.pop(0)
+        return output if output else failed("Unknown")
+
+    collectors(serial=serial_number)
+    get_info.available_methods["serial"].ttl = "static"
+
+    info, status = get_info.collect_info("serial", batch=False, workers=0, cache=cache)
+    assert info["serial"] == "Unknown"
+    assert status["serial"]["status"] == "error"
+    assert "serial" not in (cache.entries or {})
+
+    info, status = get_info.collect_info("serial", batch=False, workers=0, cache=cache)
+    assert (info["serial"], status["serial"]["status"]) == ("SN1", "ok")
+    assert get_info.collect_info("serial", batch=False, workers=0, cache=cache)[1]["serial"]["status"] == "cached"
@@ -0,0 +1,84 @@
+import json
+import subprocess
+
+import pytest
+
+import powershell
+from collectors.queries import POWERSHELL_QUERIES
+from collectors.security import SecurityInfo
+
+QUERIES = {name: POWERSHELL_QUERIES[name] for name in ("antivirus", "firewall")}
+# As PowerShell prints them: Out-String keeps its CRLF line endings
+OUTPUTS = {
+    "antivirus": json.dumps([{"displayName": "Windows Defender"}], indent=4).replace("\n", "\r\n"),
+    "firewall": json.dumps([{"Name": name, "Enabled": True} for name in ("Domain", "Public")], indent=4).replace("\n", "\r\n"),
+}
+
+
+class Runner:
+    """Answers a batched script with batch(names of the queries in it), and single queries from OUTPUTS."""
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.calls = []  # "batch" or the name of the query run on its own
+
+    def __call__(self, args, check=True, timeout=None):
+        script = args[-1]
+        if "$results = @{}" in script:
+            self.calls.append("batch")
+            return self.batch([name for name in POWERSHELL_QUERIES if f"$results['{name}']" in script])
+        name = next(name for name, command in POWERSHELL_QUERIES.items() if command.strip() == script.strip())
+        self.calls.append(name)
+        return OUTPUTS[name].replace("\r\n", "\n")
+
+
+@pytest.fixture
+def use_runner(monkeypatch):
+    # Recorded so they are put back after the test
+    for name in ("command_runner", "async_command_runner", "stream_runner"):
+        monkeypatch.setattr(powershell, name, getattr(powershell, name))
+
+    def use(batch):
+        runner = Runner(batch)
+        powershell.set_command_runner(runner)
+        return runner
+    return use
+
+
+def collect():
+    with powershell.batch(QUERIES):
+        return SecurityInfo.get_antivirus_details(), SecurityInfo.get_firewall_details()
+
+
+def test_collectors_parse_the_batched_outputs(use_runner):
+    runner = use_runner(lambda names: json.dumps({name: OUTPUTS[name] for name in names}))
+
+    assert collect() == (["Windows Defender"], {"Domain": True, "Public": True})
+    assert runner.calls == ["batch"]
+    assert powershell.run_batch(QUERIES) == {name: OUTPUTS[name].replace("\r\n", "\n") for name in QUERIES}
+
+
+def test_query_missing_from_the_batch_runs_on_its_own(use_runner):
+    # The firewall query threw inside the batch script, so it has no entry
+    runner = use_runner(lambda names: json.dumps({"antivirus": OUTPUTS["antivirus"]}))
+
+    assert collect() == (["Windows Defender"], {"Domain": True, "Public": True})
+    assert runner.calls == ["batch", "firewall"]
+
+
+def fail(names):
+    raise subprocess.CalledProcessError(1, ["powershell"])
+
+
+@pytest.mark.parametrize("batch", [
+    fail,
+    lambda names: "The term 'Get-NetFirewallProfile' is not recognized",
+    lambda names: json.dumps([OUTPUTS[name] for name in names]),
+], ids=["failed", "not-json", "not-an-object"])
+def test_broken_batch_falls_back_to_individual_calls(use_runner, batch):
+    runner = use_runner(batch)
+
+    assert powershell.run_batch(QUERIES) == {}
+    runner.calls.clear()
+    assert collect() == (["Windows Defender"], {"Domain": True, "Public": True})
+    assert runner.calls == ["batch", "antivirus", "firewall"]
@@ -0,0 +1,82 @@
+import pytest
+
+from benchmarks.fixtures import FakePsutil
+
+pytest.importorskip("psutil")
+
+import processes  # noqa: E402
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    fake = FakePsutil("small")
+    walks = []
+    pids = fake.pids
+    fake.pids = lambda: walks.append(True) or pids()
+    fake.walks = walks
+    monkeypatch.setattr(processes, "psutil", fake)
+    return fake
+
+
+def test_collectors_in_one_collection_share_a_snapshot(fake_psutil, clock):
+    tracker = processes.ProcessTracker(clock=clock)
+
+    records = tracker.snapshot()
+    processes.columnar(tracker.snapshot())
+    tracker.changes()
+    assert len(fake_psutil.walks) == 1
+    assert tracker.snapshot() is records
+
+    clock.now += processes.SHARE_WINDOW + 1
+    assert tracker.snapshot() is not records
+    assert len(fake_psutil.walks) == 2
+
+
+def collect(tracker, *names):
+    """What a scheduled collection for these consumers delivers to each: consumer -> process_changes."""
+    with processes.consumers(*names):
+        data = {"process_changes": tracker.changes()}
+    return {name: tracker.unseen(name, data)["process_changes"] for name in names}
+
+
+def test_changes_compares_snapshots_from_different_collections(fake_psutil, clock):
+    tracker = processes.ProcessTracker(clock=clock)
+    first = collect(tracker, "hourly")["hourly"]
+    assert len(first["new"]) == len(fake_psutil.process_table)
+    tracker.acknowledge("hourly", {"process_changes": first})
+
+    del fake_psutil.process_table[4]
+    clock.now += processes.SHARE_WINDOW + 1
+    second = collect(tracker, "hourly")["hourly"]
+    assert second["new"] == [] and second["exited"] == [4]
+
+
+def test_each_consumer_gets_the_changes_since_its_last_delivery(fake_psutil, clock):
+    tracker = processes.ProcessTracker(clock=clock)
+    tracker.acknowledge("hourly", {"process_changes": collect(tracker, "hourly")["hourly"]})
+
+    del fake_psutil.process_table[4]
+    clock.now += processes.SHARE_WINDOW + 1
+    both = collect(tracker, "hourly", "daily")
+    assert both["hourly"]["exited"] == [4]
+    assert len(both["daily"]["new"]) == len(fake_psutil.process_table)
+    # daily's send failed, so it gets all of it again; hourly's exit is not reported twice
+    tracker.acknowledge("hourly", {"process_changes": both["hourly"]})
+
+    clock.now += processes.SHARE_WINDOW + 1
+    again = collect(tracker, "hourly", "daily")
+    assert again["hourly"]["new"] == [] and again["hourly"]["exited"] == []
+    assert len(again["daily"]["new"]) == len(fake_psutil.process_table)
+
+
+def test_ad_hoc_changes_leave_baselines_alone(fake_psutil, clock):
+    tracker = processes.ProcessTracker(clock=clock)
+    tracker.acknowledge("hourly", {"process_changes": collect(tracker, "hourly")["hourly"]})
+
+    del fake_psutil.process_table[4]
+    clock.now += processes.SHARE_WINDOW + 1
+    assert tracker.changes()["exited"] == [4]
+    clock.now += processes.SHARE_WINDOW + 1
+    assert tracker.changes()["exited"] == []
+
+    assert collect(tracker, "hourly")["hourly"]["exited"] == [4]
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.fixtures import FakePsutil
+
+pytest.importorskip("psutil")
+
+import sampler  # noqa: E402
+from collectors.other import OtherInfo  # noqa: E402
+
+
+class Memory:
+    def __init__(self, available, total=16 * 1024**3):
+        self.available = available
+        self.total = total
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    fake = FakePsutil("small")
+    fake.available = [8 * 1024**3]
+    fake.virtual_memory = lambda: Memory(fake.available[0])
+    monkeypatch.setattr(sampler, "psutil", fake)
+    monkeypatch.setattr("collectors.other.psutil", fake)
+    return fake
+
+
+def test_memory_usage_reports_the_window_of_samples(fake_psutil, monkeypatch, clock):
+    background = sampler.Sampler(interval=2, clock=clock)
+    monkeypatch.setattr(sampler, "default_sampler", background)
+
+    for available in (None, 8, 6, 7):  # the first sample only primes the CPU times
+        fake_psutil.available[0] = (available or 0) * 1024**3
+        background.sample()
+        clock.now += 2
+
+    usage = OtherInfo.get_memory_usage()
+    assert usage["memory_available"] == 7 * 1024**3
+    assert usage["memory_available_min"] == 6 * 1024**3
+    assert usage["memory_available_max"] == 8 * 1024**3
+    assert usage["memory_available_avg"] == 7 * 1024**3
+    assert usage["memory_total"] == 16 * 1024**3
+
+
+def test_memory_usage_without_samples_reads_memory_once(fake_psutil, monkeypatch, clock):
+    monkeypatch.setattr(sampler, "default_sampler", sampler.Sampler(clock=clock))
+
+    usage = OtherInfo.get_memory_usage()
+    assert usage["memory_available"] == usage["memory_available_min"] == 8 * 1024**3
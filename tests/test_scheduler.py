@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("psutil")  # the agent's process tracking, which scheduler sends changes of
+
+import scheduler  # noqa: E402
+
+
+@pytest.fixture
+def make_scheduler(tmp_path, clock):
+    schedules_dir = tmp_path / "schedules"
+    schedules_dir.mkdir()
+
+    def make(**options):
+        options = {"slack": 0, "align": False, "phase": 0, **options}
+        return scheduler.Scheduler(str(schedules_dir), str(tmp_path / "last_sent.json"), clock=clock, **options)
+
+    return make
+
+
+def write_schedule(scheduler_, name, interval, details=("cpu_usage",)):
+    with open(os.path.join(scheduler_.schedules_dir, name), "w") as f:
+        json.dump({"interval": interval, "details_required": list(details)}, f)
+
+
+def run_due(scheduler_):
+    names = scheduler_.pop_due()
+    for name in names:
+        scheduler_.mark_sent(name)
+    return names
+
+
+def test_new_schedules_are_due_at_once_then_by_interval(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "fast.json", 60)
+    write_schedule(schedules, "slow.json", 300)
+
+    assert sorted(run_due(schedules)) == ["fast.json", "slow.json"]
+    assert schedules.next_due() == clock.now + 60
+    assert run_due(schedules) == []
+
+    clock.now += 60
+    assert run_due(schedules) == ["fast.json"]
+    clock.now += 240
+    assert sorted(run_due(schedules)) == ["fast.json", "slow.json"]
+
+
+def test_due_order_follows_last_sent(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 100)
+    write_schedule(schedules, "b.json", 100)
+    with open(schedules.state_file, "w") as f:
+        json.dump({
+            "a.json": {"last_sent": clock.now - 20, "interval": 100},
+            "b.json": {"last_sent": clock.now - 50, "interval": 100},
+        }, f)
+
+    assert schedules.next_due() == clock.now + 50
+    clock.now += 50
+    assert run_due(schedules) == ["b.json"]
+    assert schedules.next_due() == clock.now + 30
+
+
+def test_slack_pulls_schedules_into_one_collection(make_scheduler, clock):
+    schedules = make_scheduler(slack=30)
+    write_schedule(schedules, "a.json", 100)
+    write_schedule(schedules, "b.json", 100)
+    with open(schedules.state_file, "w") as f:
+        json.dump({
+            "a.json": {"last_sent": clock.now - 100, "interval": 100},
+            "b.json": {"last_sent": clock.now - 80, "interval": 100},
+        }, f)
+
+    assert sorted(schedules.pop_due()) == ["a.json", "b.json"]
+
+
+def test_update_replaces_the_due_time(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 3600)
+    run_due(schedules)
+    assert schedules.next_due() == clock.now + 3600
+
+    schedules.update("a.json", {"interval": 60, "details_required": ["cpu_usage"]})
+    assert schedules.next_due() == clock.now + 60
+    clock.now += 60
+    assert run_due(schedules) == ["a.json"]
+    assert schedules.next_due() == clock.now + 60
+
+
+def test_create_schedule_writes_file_and_updates_memory(make_scheduler, clock, monkeypatch):
+    schedules = make_scheduler()
+    monkeypatch.setattr(scheduler, "schedules", schedules)
+    monkeypatch.setattr(scheduler, "SCHEDULES_DIR", schedules.schedules_dir)
+
+    scheduler.create_schedule("inventory", 600, ["storage"])
+
+    with open(os.path.join(schedules.schedules_dir, "inventory.json")) as f:
+        assert json.load(f) == {"interval": 600, "details_required": ["storage"]}
+    assert schedules.schedules["inventory.json"]["interval"] == 600
+    assert run_due(schedules) == ["inventory.json"]
+
+
+def test_state_is_written_only_after_a_run(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 60)
+
+    schedules.next_due()
+    schedules.save()
+    assert not os.path.exists(schedules.state_file)
+
+    run_due(schedules)
+    schedules.save()
+    with open(schedules.state_file) as f:
+        assert json.load(f) == {"a.json": {"last_sent": clock.now, "interval": 60}}
+
+    # Nothing ran since: the file is left alone
+    os.utime(schedules.state_file, ns=(0, 0))
+    schedules.save()
+    assert os.stat(schedules.state_file).st_mtime_ns == 0
+    assert not os.path.exists(f"{schedules.state_file}.tmp")
+
+
+def test_torn_state_file_leaves_schedules_running(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 60)
+    with open(schedules.state_file, "w") as f:
+        f.write('{"a.json": {"last_se')
+
+    assert run_due(schedules) == ["a.json"]
+    assert schedules.next_due() == clock.now + 60
+
+
+def test_torn_schedule_file_is_skipped(make_scheduler, clock):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 60)
+    with open(os.path.join(schedules.schedules_dir, "b.json"), "w") as f:
+        f.write('{"interval": 6')
+
+    assert run_due(schedules) == ["a.json"]
+    assert "b.json" not in schedules.schedules
+
+
+def test_schedule_pulled_forward_is_not_collected_again_at_its_due_time(make_scheduler, clock):
+    clock.now = 36_000.0 - 100
+    schedules = make_scheduler(slack=30, align=True)
+    write_schedule(schedules, "hourly.json", 3600)
+    with open(schedules.state_file, "w") as f:
+        json.dump({"hourly.json": {"last_sent": 36_000.0 - 3600, "interval": 3600}}, f)
+    assert schedules.next_due() == 36_000.0
+
+    # A new schedule 20 s before the boundary pulls the hourly one into its collection
+    clock.now = 36_000.0 - 20
+    schedules.update("new.json", {"interval": 60, "details_required": ["cpu_usage"]})
+    assert sorted(run_due(schedules)) == ["hourly.json", "new.json"]
+
+    clock.now = 36_000.0
+    assert "hourly.json" not in run_due(schedules)
+    assert schedules.due["hourly.json"] == 36_000.0 + 3600
+
+
+def test_new_schedule_just_before_its_boundary_waits_a_full_interval(make_scheduler, clock):
+    day = 24 * 3600
+    clock.now = 20 * day - 5
+    schedules = make_scheduler(slack=30, align=True)
+    schedules.update("daily.json", {"interval": day, "details_required": ["storage"]})
+
+    assert run_due(schedules) == ["daily.json"]
+    assert schedules.next_due() == 21 * day
+
+
+def test_schedule_updated_while_collecting_still_runs_and_is_rescheduled(make_scheduler, clock, monkeypatch, tmp_path):
+    schedules = make_scheduler()
+    write_schedule(schedules, "a.json", 60, details=("storage",))
+    write_schedule(schedules, "b.json", 60, details=("storage",))
+    monkeypatch.setattr(scheduler, "schedules", schedules)
+    monkeypatch.setattr(scheduler.spool, "default_spool", scheduler.spool.Spool(str(tmp_path / "spool")))
+
+    async def collect_info_async(*details):
+        # A create_schedule event handled during the collection adds a detail nobody collected
+        schedules.update("a.json", {"interval": 60, "details_required": ["storage", "cpu_usage"]})
+        return {detail: f"{detail} value" for detail in details}, {}
+    monkeypatch.setattr(scheduler, "collect_info_async", collect_info_async)
+
+    class Offline:
+        connected = False
+
+    asyncio.run(scheduler.run_scheduler(Offline()))
+
+    spooled = {record["schedule"]: record["data"] for record in scheduler.spool.default_spool.pending(10)}
+    assert spooled == {"a": {"storage": "storage value"}, "b": {"storage": "storage value"}}
+    assert schedules.due == {"a.json": clock.now + 60, "b.json": clock.now + 60}
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+import schema
+import timeseries
+
+STORAGE = {"C:": {"total": 400, "free": 100}, "D:": {"total": "100 B", "free": None}}
+
+
+def test_quantity_extractors():
+    assert schema.total_quantity(STORAGE.values(), "total") == 500
+    assert schema.total_quantity(STORAGE.values(), "free") == 100
+    assert schema.total_quantity([{"size": None}], "size") is None
+    assert schema.disk_free_percent(STORAGE) == 20
+    assert schema.disk_free_percent({"C:": {"total": None, "free": None}}) is None
+    assert schema.cpu_usage_percent({"cpu_usage_percent": 30.0, "cpu_usage_avg": 12.5}) == 12.5
+    assert schema.cpu_usage_percent("40.0%") == 40.0
+
+
+def test_fleet_view_and_time_series_read_the_same_values():
+    aggregate = pytest.importorskip("aggregate", reason="the fleet view needs numpy")
+    data = {"storage": STORAGE, "cpu_usage": {"cpu_usage_avg": 12.5}}
+    view = aggregate.FleetView()
+    view.update("a", data)
+    samples = dict(timeseries.extract(data))
+
+    for metric in ("disk_free_percent", "disk_free_bytes", "cpu_usage_percent"):
+        assert view.summary(metric)["max"] == samples[metric]
+
+    # Missing values are NaN in the fleet view and left out of the time series
+    view.update("a", {"storage": {"C:": {"total": None, "free": None}}})
+    assert math.isnan(view.columns["disk_free_percent"][0])
+    assert "disk_free_percent" not in dict(timeseries.extract({"storage": {"C:": {"total": None, "free": None}}}))
+
+
+def test_raw_quantities_render_in_their_legacy_units():
+    data = {
+        "network_adapters": [{"name": "Ethernet", "speed": 1_000_000_000}, {"name": "Wi-Fi", "speed": None}],
+        "running_processes": [{"pid": 4, "name": "System", "rss": 3 * 1024 * 1024 + 5}],
+        "battery_status": {"percent": 80, "power_plugged": True, "secsleft": None},
+    }
+
+    legacy = schema.render(data, schema.LEGACY)
+    assert legacy["network_adapters"] == [{"name": "Ethernet", "speed_mbps": 1000}, {"name": "Wi-Fi", "speed_mbps": "Unknown"}]
+    assert legacy["running_processes"] == [{"pid": 4, "name": "System", "memory": 3}]
+    assert legacy["battery_status"]["secsleft"] == "Unlimited"
+    assert schema.render({"battery_status": {"power_plugged": False, "secsleft": None}}, schema.LEGACY)["battery_status"]["secsleft"] == -1
+    assert schema.render(data, schema.RAW) is data
+
+
+def test_legacy_values_pass_through():
+    # e.g. reports spooled by an agent from before the switch to raw values
+    data = {
+        "network_adapters": {"error": "No network adapters found."},
+        "running_processes": [{"pid": 4, "name": "System", "memory": 3}],
+        "battery_status": {"percent": 80, "power_plugged": True, "secsleft": "Unlimited"},
+    }
+    assert schema.render(data, schema.LEGACY) == data
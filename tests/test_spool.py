@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from spool import Spool
+
+
+@pytest.fixture(params=[True, False], ids=["gzip", "plain"])
+def make_spool(request, tmp_path):
+    now = [1_700_000_000.0]
+
+    def make(**options):
+        spool = Spool(str(tmp_path), compress=request.param, clock=lambda: now[0], **options)
+        spool.now = now
+        return spool
+
+    return make
+
+
+def ids(records):
+    return [record["id"] for record in records]
+
+
+def segment_files(spool):
+    return [os.path.basename(path) for _, path in spool._segments()]
+
+
+def test_reports_come_back_in_order_across_segments(make_spool):
+    spool = make_spool(segment_size=1)
+    for i in range(3):
+        spool.append("1", {"n": i})
+
+    assert len(segment_files(spool)) == 3
+    records = spool.pending(10)
+    assert ids(records) == [1, 2, 3]
+    assert [record["data"]["n"] for record in records] == [0, 1, 2]
+    assert ids(spool.pending(2)) == [1, 2]
+
+
+def test_acknowledged_segments_are_deleted(make_spool):
+    spool = make_spool(segment_size=1)
+    for i in range(4):
+        spool.append("1", {"n": i})
+
+    spool.acknowledge(2)
+    assert ids(spool.pending(10)) == [3, 4]
+    assert len(segment_files(spool)) == 2
+
+    # The cursor survives a restart, and ids carry on past it
+    restarted = make_spool(segment_size=1)
+    assert ids(restarted.pending(10)) == [3, 4]
+    restarted.append("1", {"n": 4})
+    assert ids(restarted.pending(10)) == [3, 4, 5]
+
+
+def test_oldest_segments_are_dropped_beyond_the_size_bound(make_spool):
+    spool = make_spool(segment_size=1, max_size=1)
+    for i in range(3):
+        spool.append("1", {"n": i})
+
+    # Only the segment being written to is kept
+    assert ids(spool.pending(10)) == [3]
+
+
+def test_segments_past_the_age_bound_are_dropped(make_spool):
+    spool = make_spool(segment_size=1, max_age=3600)
+    spool.append("1", {"n": 0})
+    spool.append("1", {"n": 1})
+
+    spool.now[0] = os.path.getmtime(spool._segments()[0][1]) + 7200
+    spool.append("1", {"n": 2})
+    assert ids(spool.pending(10)) == [3]
+
+
+def test_torn_tail_is_skipped_and_writes_go_to_a_new_segment(make_spool):
+    spool = make_spool()
+    for i in range(3):
+        spool.append("1", {"n": i})
+    (_, path), = spool._segments()
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 40)  # into the last record
+
+    restarted = make_spool()
+    for i in range(5):
+        restarted.append("1", {"n": i})
+    assert ids(restarted.pending(100)) == [1, 2, 3, 4, 5, 6, 7]
+    assert len(segment_files(restarted)) == 2
+
+    # And after the next restart: the torn segment isn't the last one any more
+    again = make_spool()
+    again.append("1", {"n": 5})
+    assert ids(again.pending(100)) == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert len(segment_files(again)) == 2
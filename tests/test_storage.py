@@ -0,0 +1,46 @@
+import sqlite3
+
+import storage
+
+
+def report(timestamp):
+    return {
+        "schedule": "1",
+        "timestamp": timestamp,
+        "data": {
+            "cpu_usage": {"cpu_usage_percent": 12.5},
+            "running_processes": [{"pid": 4, "name": "System"}],
+            "storage": {"C:": {"total": 512, "free": 100}},
+            "installed_software": [{"name": "App", "version": "1.0"}],
+        },
+    }
+
+
+def test_compact_strips_volatile_sections_from_old_reports(tmp_path):
+    now = 1_700_000_000.0
+    store = storage.ReportStore(str(tmp_path / "reports.db"), clock=lambda: now)
+    store.append_many([("a", report(now - storage.VOLATILE_MAX_AGE - 60)), ("a", report(now - 60))])
+
+    assert store.compact() == 0
+    old, new = store.history("a")
+    assert old["data"] == {"storage": {"C:": {"total": 512}}, "installed_software": [{"name": "App", "version": "1.0"}]}
+    assert new["data"] == report(now - 60)["data"]
+    # Already trimmed reports aren't rewritten again
+    assert store.trim() == 0
+    # The latest values are untouched
+    assert store.latest("a")["cpu_usage"]["value"] == {"cpu_usage_percent": 12.5}
+
+
+def test_databases_from_before_trimming_are_migrated(tmp_path):
+    path = str(tmp_path / "reports.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE reports (id INTEGER PRIMARY KEY, serial_number TEXT NOT NULL, schedule TEXT, "
+               "timestamp REAL NOT NULL, spooled INTEGER NOT NULL DEFAULT 0, data BLOB NOT NULL)")
+    db.execute("INSERT INTO reports (serial_number, schedule, timestamp, data) VALUES (?, ?, ?, ?)",
+               ("a", "1", 0.0, storage._encode(report(0.0)["data"])))
+    db.commit()
+    db.close()
+
+    store = storage.ReportStore(path, clock=lambda: 1_700_000_000.0)
+    assert store.trim() == 1
+    assert "cpu_usage" not in store.history("a")[0]["data"]
@@ -0,0 +1,26 @@
+import pytest
+
+import wire
+
+
+def test_round_trip():
+    report = {"schedule": "1", "data": {"storage": {"C:": {"free": 1}}}}
+    for compression in wire.compressors:
+        assert wire.decode(wire.encode(report, "json", compression)) == report
+
+
+@pytest.mark.parametrize("frame", [
+    b"",
+    b"TRK",
+    b"TRK\x01",
+    b"XYZ\x01\x00\x00{}",
+    b"TRK\x02\x00\x00{}",
+    b"TRK\x01\x09\x00{}",  # unknown encoding
+    b"TRK\x01\x00\x09{}",  # unknown compression
+    b"TRK\x01\x00\x01not zlib",
+    b"TRK\x01\x00\x00{not json",
+    wire.encode({"a": 1}, "json", "zlib")[:-4],  # truncated
+])
+def test_malformed_frames_raise_value_error(frame):
+    with pytest.raises(ValueError):
+        wire.decode(frame)
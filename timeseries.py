@@ -0,0 +1,184 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+from schema import cpu_usage_percent, disk_free_percent, total_quantity
+from storage import BUSY_TIMEOUT, DATA_DIR, VOLATILE_MAX_AGE, epoch_seconds
+
+DATABASE_FILE = os.path.join(DATA_DIR, "metrics.db")
+
+RAW = 0
+# Bucket size in seconds -> seconds of data kept at that resolution (RAW: the samples themselves)
+RETENTION = {
+    RAW: VOLATILE_MAX_AGE,  # as long as full reports keep the volatile sections
+    300: 30 * 24 * 3600,
+    3600: 365 * 24 * 3600,
+    86400: 5 * 365 * 24 * 3600,
+}
+MAX_POINTS = 500  # series() picks the finest resolution that fits the range in this many points
+RAW_MAX_RANGE = 24 * 3600  # seconds; longer ranges are read from rollups
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    serial_number TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (serial_number, metric, timestamp)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    serial_number TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    minimum REAL NOT NULL,
+    maximum REAL NOT NULL,
+    PRIMARY KEY (serial_number, metric, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (serial_number, metric, resolution, bucket, count, total, minimum, maximum)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (serial_number, metric, resolution, bucket) DO UPDATE SET
+    count = count + 1, total = total + excluded.total,
+    minimum = MIN(minimum, excluded.minimum), maximum = MAX(maximum, excluded.maximum)
+"""
+
+
+# metric -> (collector it comes from, extractor over that collector's value)
+METRICS = {
+    "cpu_usage_percent": ("cpu_usage", cpu_usage_percent),
+    "memory_available_bytes": ("memory_usage", lambda value: value.get("memory_available_avg", value.get("memory_available"))),
+    "disk_free_bytes": ("storage", lambda value: total_quantity(value.values(), "free")),
+    "disk_free_percent": ("storage", disk_free_percent),
+    "battery_percent": ("battery_status", lambda value: value.get("percent")),
+    "process_count": ("running_processes", len),
+}
+
+
+def extract(data):
+    """(metric, value) for each volatile metric the report data carries."""
+    samples = []
+    for metric, (collector, extractor) in METRICS.items():
+        if collector not in data:
+            continue
+        try:
+            value = extractor(data[collector])
+        except (AttributeError, KeyError, TypeError, ValueError, ZeroDivisionError):
+            continue
+        if value is not None and isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value):
+            samples.append((metric, float(value)))
+    return samples
+
+
+class MetricStore:
+    """Volatile metrics per device, as raw samples plus 5-minute, hourly and daily rollups.
+
+    Rollups (count, sum, min, max per bucket) are updated as each sample arrives, so reading a
+    long range means reading a few hundred buckets. Each resolution is only kept for its
+    RETENTION, which bounds how much a device can store.
+    """
+
+    def __init__(self, path=DATABASE_FILE, retention=RETENTION, clock=time.time):
+        self.path = path
+        self.retention = retention
+        self.clock = clock
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+
+    def connection(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self.local.db = db
+        return db
+
+    def append_many(self, reports):
+        """Record the metrics of (serial_number, report) pairs; the same input as ReportStore.append_many."""
+        now = self.clock()
+        samples, rollups = [], []
+        for serial_number, report in reports:
+            if not isinstance(report.get("data"), dict):
+                continue
+            timestamp = epoch_seconds(report.get("timestamp", now))
+            for metric, value in extract(report["data"]):
+                if now - timestamp < self.retention[RAW]:
+                    samples.append((serial_number, metric, timestamp, value))
+                for resolution in self.retention:
+                    if resolution != RAW and now - timestamp < self.retention[resolution]:
+                        bucket = int(timestamp // resolution * resolution)
+                        rollups.append((serial_number, metric, resolution, bucket, value, value, value))
+
+        db = self.connection()
+        with metrics.timer("storage_write_seconds", store="metrics"), self.write_lock, db:
+            db.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?)", samples)
+            db.executemany(UPSERT_ROLLUP, rollups)
+        return len(samples)
+
+    def resolution_for(self, since, until):
+        """Finest resolution that still holds data from since and covers the range in MAX_POINTS."""
+        age, span = self.clock() - since, until - since
+        if age <= self.retention[RAW] and span <= RAW_MAX_RANGE:
+            return RAW
+        for resolution in sorted(self.retention):
+            if resolution != RAW and age <= self.retention[resolution] and span / resolution <= MAX_POINTS:
+                return resolution
+        return max(self.retention)
+
+    def series(self, serial_number, metric, since, until=None, resolution=None):
+        """Points between since and until: {"time", "avg", "min", "max", "count"}, oldest first."""
+        until = self.clock() if until is None else until
+        resolution = self.resolution_for(since, until) if resolution is None else resolution
+        db = self.connection()
+
+        if resolution == RAW:
+            rows = db.execute(
+                "SELECT timestamp, value, value, value, 1 FROM samples"
+                " WHERE serial_number = ? AND metric = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                (serial_number, metric, since, until),
+            )
+        else:
+            rows = db.execute(
+                "SELECT bucket, total / count, minimum, maximum, count FROM rollups"
+                " WHERE serial_number = ? AND metric = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                (serial_number, metric, resolution, since // resolution * resolution, until),
+            )
+        return resolution, [
+            {"time": row[0], "avg": row[1], "min": row[2], "max": row[3], "count": row[4]}
+            for row in rows
+        ]
+
+    def compact(self):
+        """Drop samples and buckets older than their resolution's retention."""
+        now = self.clock()
+        db = self.connection()
+        removed = 0
+        with self.write_lock:
+            with db:
+                for resolution, keep in self.retention.items():
+                    if resolution == RAW:
+                        removed += db.execute("DELETE FROM samples WHERE timestamp < ?", (now - keep,)).rowcount
+                    else:
+                        removed += db.execute(
+                            "DELETE FROM rollups WHERE resolution = ? AND bucket < ?", (resolution, now - keep)
+                        ).rowcount
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if removed:
+            logging.info(f"Compacted metric store: removed {removed} rows")
+        return removed
+
+
+default_store = MetricStore()
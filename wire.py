@@ -0,0 +1,104 @@
+import json
+import zlib
+import metrics
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"TRK"
+VERSION = 1
+CONTENT_TYPE = "application/x-trackit-frame"
+COMPRESSION_LEVEL = 6
+
+ENCODINGS = {"json": 0, "msgpack": 1}
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}
+
+
+def _json_encode(obj):
+    return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+# name -> (encode, decode), for what is installed
+encoders = {"json": (_json_encode, json.loads)}
+if msgpack is not None:
+    encoders["msgpack"] = (
+        lambda obj: msgpack.packb(obj, default=str),
+        lambda raw: msgpack.unpackb(raw, strict_map_key=False),
+    )
+
+compressors = {
+    "none": (bytes, bytes),
+    "zlib": (lambda raw: zlib.compress(raw, COMPRESSION_LEVEL), zlib.decompress),
+}
+if zstandard is not None:
+    compressors["zstd"] = (
+        lambda raw: zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw),
+        lambda raw: zstandard.ZstdDecompressor().decompress(raw),
+    )
+
+
+def capabilities():
+    """What this side can encode and decode, best first, for the register handshake."""
+    return {
+        "encodings": [name for name in ("msgpack", "json") if name in encoders],
+        "compression": [name for name in ("zstd", "zlib", "none") if name in compressors],
+    }
+
+
+def negotiate(offered):
+    """Pick the best format both sides support from the other side's capabilities()."""
+    ours = capabilities()
+    encoding = next((name for name in offered.get("encodings", []) if name in ours["encodings"]), "json")
+    compression = next((name for name in offered.get("compression", []) if name in ours["compression"]), "none")
+    return {"encoding": encoding, "compression": compression}
+
+
+def encode(obj, encoding="json", compression="zlib"):
+    """Encode to a frame: magic, version, encoding and compression ids, then the payload."""
+    payload = compressors[compression][0](encoders[encoding][0](obj))
+    return MAGIC + bytes([VERSION, ENCODINGS[encoding], COMPRESSIONS[compression]]) + payload
+
+
+def decode(frame):
+    """Decode a frame from encode(). Raises ValueError for anything this side can't read as one."""
+    frame = bytes(frame)
+    if len(frame) < 6 or frame[:3] != MAGIC or frame[3] != VERSION:
+        raise ValueError("Not a TrackIt frame")
+    encoding = next((name for name, number in ENCODINGS.items() if number == frame[4]), None)
+    compression = next((name for name, number in COMPRESSIONS.items() if number == frame[5]), None)
+    if encoding not in encoders or compression not in compressors:
+        raise ValueError(f"Unsupported frame format: encoding {frame[4]}, compression {frame[5]}")
+    try:
+        return encoders[encoding][1](compressors[compression][1](frame[6:]))
+    except ValueError:
+        raise
+    except Exception as e:  # zlib.error, zstandard.ZstdError, msgpack's unpack errors
+        raise ValueError(f"Malformed {encoding}+{compression} frame: {e}") from e
+
+
+def is_frame(data):
+    return isinstance(data, (bytes, bytearray)) and bytes(data[:3]) == MAGIC
+
+
+def unpack(data):
+    """Accept either a legacy JSON payload (already a dict) or a frame. Raises ValueError for a malformed frame."""
+    return decode(data) if is_frame(data) else data
+
+
+# Format the agent uses for its payloads; stays legacy JSON unless the server agreed on a better one
+negotiated = None
+
+
+def pack(obj):
+    if negotiated is None:
+        return obj
+    frame = encode(obj, **negotiated)
+    metrics.observe("payload_bytes", len(frame), buckets=metrics.BYTES, **negotiated)
+    return frame